@@ -3,6 +3,7 @@ from backend.api.v1.schemas.chat import ChatMessage
 from core.services.openrouter_service import openrouter_service
 from core.services.database import Database
 from backend.services.web_auth_service import get_user_full_profile_by_id, internal_token_dependency, get_db
+from backend.services.sse import answer_stream_response
 
 router = APIRouter()
 
@@ -24,4 +25,16 @@ async def chat_with_bot(
     # 2. Get bot response
     bot_response = await openrouter_service.get_Psiko_answer(chat_message.message, profile=user_profile)
 
-    return {"response": bot_response}
\ No newline at end of file
+    return {"response": bot_response}
+
+@router.post("/stream", dependencies=[Depends(internal_token_dependency)])
+async def chat_with_bot_stream(
+    chat_message: ChatMessage,
+    db: Database = Depends(get_db)
+):
+    """Streaming variant for the Telegram bot (SSE: `token` events, then one `done` event)."""
+    user_profile = get_user_full_profile_by_id(db, chat_message.user_id)
+    if not user_profile:
+        raise HTTPException(status_code=404, detail="User profile not found")
+
+    return answer_stream_response(chat_message.message, user_profile)
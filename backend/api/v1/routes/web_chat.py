@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 
 from backend.services.web_auth_service import get_current_active_user, get_user_full_profile_by_id, get_db
+from backend.services.sse import answer_stream_response
 from backend.api.v1.schemas.user import User
 from core.services.openrouter_service import openrouter_service
 from core.services.database import Database
@@ -24,12 +25,29 @@ async def handle_web_chat(
     Handles chat messages from the web interface. Requires JWT authentication.
     The user is identified via the token, not the request body.
     """
+    user_profile = _get_chat_profile(current_user, db)
+    answer = await openrouter_service.get_Psiko_answer(request.message, profile=user_profile)
+    return ChatResponse(response=answer)
+
+@router.post("/stream")
+async def handle_web_chat_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Database = Depends(get_db)
+):
+    """
+    Streaming variant of the web chat as Server-Sent Events.
+    Emits `token` events ({"text": ...}) while the model is answering and one final
+    `done` event ({"response": ...}) with the formatted answer.
+    """
+    user_profile = _get_chat_profile(current_user, db)
+    return answer_stream_response(request.message, user_profile)
+
+def _get_chat_profile(current_user: User, db: Database):
     user_profile = get_user_full_profile_by_id(db, current_user.id)
     if current_user.get('role') != 'admin':
         if not user_profile:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User profile not found")
         if not user_profile.get("health_results"):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Please complete the questionnaire before using the chat.")
-
-    answer = await openrouter_service.get_Psiko_answer(request.message, profile=user_profile)
-    return ChatResponse(response=answer)
\ No newline at end of file
+    return user_profile
\ No newline at end of file
@@ -1,9 +1,12 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from bot_tele.bot import psikobot
+from core.services.rag_service import rag_service
+from core.services.openrouter_service import openrouter_service
 from backend.api.v1 import api_router
 
 logger = logging.getLogger(__name__)
@@ -13,12 +16,19 @@ async def lifespan(app: FastAPI):
     """
     Manages the bot's lifecycle.
     The bot starts polling when the FastAPI server starts and stops when it shuts down.
+    The RAG model and index are warmed in the background so liveness is not blocked on model load.
+    The pooled OpenRouter HTTP client lives for the whole process.
     """
     logger.info("Application starting up...")
+    await openrouter_service.start()
+    warm_up_task = asyncio.create_task(rag_service.warm_up_async())
     await psikobot.run_polling()
     yield
     logger.info("Application shutting down...")
+    warm_up_task.cancel()
     await psikobot.stop_polling()
+    await openrouter_service.aclose()
+    rag_service.shutdown()
 
 # Initialize FastAPI app with the lifespan manager
 app = FastAPI(
@@ -50,5 +60,29 @@ app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/health", tags=["Monitoring"])
 async def health_check():
-    """Health check endpoint for Docker and monitoring."""
-    return {"status": "ok"}
\ No newline at end of file
+    """Health check endpoint for Docker and monitoring (liveness)."""
+    return {"status": "ok", "rag": rag_service.readiness}
+
+@app.get("/health/ready", tags=["Monitoring"])
+async def readiness_check():
+    """Readiness: 503 until the embedding model and RAG index are loaded."""
+    report = rag_service.readiness_report()
+    return JSONResponse(status_code=200 if rag_service.is_ready else 503, content=report)
+
+@app.get("/metrics/cache", tags=["Monitoring"])
+async def cache_metrics():
+    """Hit/miss counters for the in-process RAG and answer caches."""
+    stats = rag_service.cache_stats()
+    if openrouter_service.answer_cache is not None:
+        stats["answer"] = openrouter_service.answer_cache.stats()
+    return stats
+
+@app.get("/metrics/models", tags=["Monitoring"])
+async def model_metrics():
+    """Per-model error rate, latency and circuit breaker state for the LLM fallbacks."""
+    return openrouter_service.model_health.snapshot()
+
+@app.get("/metrics/rate-limit", tags=["Monitoring"])
+async def rate_limit_metrics():
+    """Outbound LLM rate limiter: queue length, in-flight requests, global pause and 429 counts."""
+    return openrouter_service.rate_limiter.stats()
\ No newline at end of file
@@ -0,0 +1,35 @@
+import json
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+
+from core.services.openrouter_service import openrouter_service
+
+# Nginx tidak boleh mem-buffer stream, dan browser/proxy tidak boleh meng-cache-nya
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Satu Server-Sent Event; data dikirim sebagai JSON agar newline di jawaban aman"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def answer_events(question: str, profile: Optional[Dict]) -> AsyncIterator[str]:
+    """
+    Stream jawaban sebagai SSE:
+      event: token -> {"text": potongan jawaban}
+      event: done  -> {"response": jawaban final (sudah di-format_response)}
+    """
+    async for event, text in openrouter_service.stream_Psiko_answer(question, profile=profile):
+        if event == "token":
+            yield sse_event("token", {"text": text})
+        else:
+            yield sse_event("done", {"response": text})
+
+
+def answer_stream_response(question: str, profile: Optional[Dict]) -> StreamingResponse:
+    return StreamingResponse(answer_events(question, profile), media_type="text/event-stream", headers=SSE_HEADERS)
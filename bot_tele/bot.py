@@ -7,6 +7,8 @@ from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton, BotComm
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes, ConversationHandler, ExtBot, Defaults
 
 from common.config.settings import settings
+from common.utils.text_utils import TextUtils
+from bot_tele.message_streamer import TelegramAnswerStreamer, iter_sse
 from core.services.openrouter_service import openrouter_service
 from common.data.kitab_loader import kitab_loader
 from core.services.profiling_service import profiling_service
@@ -652,6 +654,11 @@ class PsikoBot:
             api_host = settings.INTERNAL_API_HOST or settings.APP_HOST
             api_url = f"http://{api_host}:{settings.APP_PORT}/api/v1/internal/chat/"
 
+            if settings.TELEGRAM_STREAMING_ENABLED:
+                await self.stream_answer(update, api_url + "stream", db_user_id, user_message)
+                logger.info(f"Sent streamed response to user {user_id}")
+                return
+
             # Atur timeout yang lebih lama (misal, 60 detik) untuk menunggu respons dari backend AI
             async with httpx.AsyncClient(timeout=60.0) as client:
                 headers = {
@@ -670,7 +677,9 @@ class PsikoBot:
 
             answer = response.json().get("response", "Maaf, saya tidak mengerti.")
 
-            await update.message.reply_text(answer, parse_mode='Markdown')
+            # Jawaban panjang dipecah agar tidak melewati batas 4096 karakter Telegram
+            for part in TextUtils.split_message(answer):
+                await update.message.reply_text(part, parse_mode='Markdown')
             logger.info(f"Sent response to user {user_id}")
 
         except Exception as e:
@@ -678,6 +687,34 @@ class PsikoBot:
             error_message = "Maaf, terjadi kesalahan. Silakan coba lagi nanti."
             await update.message.reply_text(error_message)
 
+    async def stream_answer(self, update: Update, api_url: str, db_user_id: int, user_message: str):
+        """Kirim placeholder lalu edit bertahap dengan token dari endpoint streaming internal"""
+        streamer = TelegramAnswerStreamer(update.message, edit_interval=settings.TELEGRAM_STREAM_EDIT_INTERVAL)
+        await streamer.start()
+        answer = None
+        try:
+            # Tanpa read timeout total: stream aktif selama token masih mengalir
+            timeout = httpx.Timeout(60.0, read=120.0)
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                async with client.stream(
+                    "POST",
+                    api_url,
+                    json={"user_id": db_user_id, "message": user_message},
+                    headers={"X-Internal-Token": settings.INTERNAL_BOT_TOKEN}
+                ) as response:
+                    if response.status_code != 200:
+                        logger.error(f"Error from chat stream API: {(await response.aread())[:500]!r}")
+                    else:
+                        async for event, data in iter_sse(response):
+                            if event == "token":
+                                await streamer.append(data.get("text", ""))
+                            elif event == "done":
+                                answer = data.get("response")
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}", exc_info=True)
+
+        await streamer.finish(answer or "Maaf, terjadi kesalahan saat memproses pesan Anda.")
+
     async def ask_naqr_question(self, update: Update, context: ContextTypes.DEFAULT_TYPE, idx: int):
         """Tampilkan pertanyaan NAQ-R ke user. Mengedit pesan jika dari callback, mengirim baru jika tidak."""
         question = profiling_service.get_naqr_question(idx)
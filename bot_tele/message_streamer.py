@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, List, Tuple
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter
+
+from common.utils.text_utils import TextUtils, TELEGRAM_MESSAGE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+STREAM_PLACEHOLDER = "⏳ Sedang menyiapkan jawaban..."
+# Sisakan ruang di bawah batas Telegram untuk kursor dan penutup blok kode
+_STREAM_SOFT_LIMIT = TELEGRAM_MESSAGE_LIMIT - 96
+_CURSOR = " ▌"
+
+
+async def iter_sse(response) -> AsyncIterator[Tuple[str, dict]]:
+    """Parse stream text/event-stream dari httpx menjadi (event, data JSON)"""
+    event, data_lines = "message", []
+    async for line in response.aiter_lines():
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+    if data_lines:
+        yield event, json.loads("\n".join(data_lines))
+
+
+class TelegramAnswerStreamer:
+    """
+    Tampilkan jawaban streaming di Telegram: placeholder diedit dengan token yang terkumpul
+    paling sering sekali per `edit_interval` detik (batas edit Telegram). Selama streaming
+    teks dikirim tanpa parse_mode karena Markdown parsial bisa tidak valid; jawaban final
+    dipecah dengan TextUtils.split_message lalu dikirim dengan Markdown (fallback teks biasa).
+    """
+
+    def __init__(self, reply_to: Message, edit_interval: float = 1.2):
+        self.reply_to = reply_to
+        self.edit_interval = edit_interval
+        self.messages: List[Message] = []
+        self.rendered: List[str] = []
+        self.text = ""
+        # Posisi awal teks milik pesan terakhir (pesan sebelumnya sudah penuh)
+        self._offset = 0
+        self._last_edit = 0.0
+
+    async def start(self):
+        message = await self.reply_to.reply_text(STREAM_PLACEHOLDER)
+        self.messages.append(message)
+        self.rendered.append(STREAM_PLACEHOLDER)
+        self._last_edit = time.monotonic()
+
+    async def append(self, token: str):
+        self.text += token
+        if time.monotonic() - self._last_edit >= self.edit_interval:
+            await self._flush()
+
+    async def _flush(self):
+        current = self.text[self._offset:]
+        while len(current) > _STREAM_SOFT_LIMIT:
+            # Pesan penuh: potong di spasi/baris terakhir lalu lanjutkan di pesan baru
+            cut = max(current.rfind("\n", 0, _STREAM_SOFT_LIMIT), current.rfind(" ", 0, _STREAM_SOFT_LIMIT))
+            cut = cut if cut > _STREAM_SOFT_LIMIT // 2 else _STREAM_SOFT_LIMIT
+            await self._edit(len(self.messages) - 1, current[:cut])
+            self._offset += cut
+            current = self.text[self._offset:]
+            message = await self.reply_to.reply_text(STREAM_PLACEHOLDER)
+            self.messages.append(message)
+            self.rendered.append(STREAM_PLACEHOLDER)
+        if current.strip():
+            await self._edit(len(self.messages) - 1, current + _CURSOR)
+        self._last_edit = time.monotonic()
+
+    async def finish(self, answer: str):
+        """Ganti isi streaming dengan jawaban final yang sudah diformat, dipecah aman untuk Markdown"""
+        parts = TextUtils.split_message(answer) or [answer]
+        for index, part in enumerate(parts):
+            if index < len(self.messages):
+                await self._edit(index, part, markdown=True)
+            else:
+                self.messages.append(await self._send(part))
+                self.rendered.append(part)
+        # Jawaban final lebih pendek dari hasil streaming: hapus pesan sisa
+        for message in self.messages[len(parts):]:
+            try:
+                await message.delete()
+            except BadRequest as e:
+                logger.warning(f"Could not delete surplus streamed message: {e}")
+        del self.messages[len(parts):], self.rendered[len(parts):]
+
+    async def _send(self, text: str) -> Message:
+        try:
+            return await self.reply_to.reply_text(text, parse_mode='Markdown')
+        except BadRequest as e:
+            logger.warning(f"Markdown rejected by Telegram, sending plain text: {e}")
+            return await self.reply_to.reply_text(text)
+
+    async def _edit(self, index: int, text: str, markdown: bool = False):
+        if self.rendered[index] == text:
+            return
+        message = self.messages[index]
+        for _ in range(3):
+            try:
+                if markdown:
+                    try:
+                        await message.edit_text(text, parse_mode='Markdown')
+                    except BadRequest as e:
+                        if "not modified" in str(e).lower():
+                            raise
+                        logger.warning(f"Markdown rejected by Telegram, editing as plain text: {e}")
+                        await message.edit_text(text)
+                else:
+                    await message.edit_text(text)
+                break
+            except RetryAfter as e:
+                # Flood control Telegram: tunggu sesuai permintaan lalu coba lagi
+                await asyncio.sleep(e.retry_after)
+            except BadRequest as e:
+                if "not modified" not in str(e).lower():
+                    raise
+                break
+        self.rendered[index] = text
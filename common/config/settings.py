@@ -16,12 +16,21 @@ class Settings:
     OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
     OPENROUTER_REFERRER = "https://github.com/Psiko-bot"  # Bebas!
     OPENROUTER_TITLE = "Psiko Chatbot Indonesia"  # Bebas!
+    # HTTP client bersama ke OpenRouter (pool koneksi + keep-alive; HTTP/2 butuh paket h2)
+    OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", 45.0))
+    OPENROUTER_HTTP2 = os.getenv("OPENROUTER_HTTP2", "False").lower() == "true"
+    OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", 50))
+    OPENROUTER_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_KEEPALIVE_CONNECTIONS", 20))
+    OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", 60.0))
     
     # Application Configuration
     APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
     APP_PORT = int(os.getenv("APP_PORT", 8010))
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
     INTERNAL_API_HOST = os.getenv("INTERNAL_API_HOST") # Host untuk komunikasi internal (bot -> api)
+    # Jawaban Telegram ditampilkan bertahap (edit pesan placeholder); interval minimal antar edit (detik)
+    TELEGRAM_STREAMING_ENABLED = os.getenv("TELEGRAM_STREAMING_ENABLED", "True").lower() == "true"
+    TELEGRAM_STREAM_EDIT_INTERVAL = float(os.getenv("TELEGRAM_STREAM_EDIT_INTERVAL", 1.2))
 
     # JWT Configuration
     SECRET_KEY = os.getenv("SECRET_KEY")
@@ -36,6 +45,119 @@ class Settings:
     # Secret token for internal communication between bot and backend
     INTERNAL_BOT_TOKEN = os.getenv("INTERNAL_BOT_TOKEN", "a_very_secret_internal_token_that_should_be_long_and_random")
     
+    # RAG Configuration
+    # Jumlah thread maksimum untuk encode + query RAG agar tidak memblokir event loop.
+    # Nilai ini juga membatasi ukuran batch embedding yang bisa terbentuk.
+    RAG_EXECUTOR_WORKERS = int(os.getenv("RAG_EXECUTOR_WORKERS", 16))
+
+    # Vector store: "chroma" atau "numpy" (flat index .npy dengan mmap, dtype float32/float16)
+    RAG_VECTOR_BACKEND = os.getenv("RAG_VECTOR_BACKEND", "chroma").lower()
+    RAG_NUMPY_INDEX_PATH = os.getenv("RAG_NUMPY_INDEX_PATH")
+    RAG_NUMPY_DTYPE = os.getenv("RAG_NUMPY_DTYPE", "float32")
+
+    # Hybrid retrieval: BM25 + vektor digabung dengan reciprocal rank fusion
+    RAG_HYBRID_ENABLED = os.getenv("RAG_HYBRID_ENABLED", "True").lower() == "true"
+    RAG_HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", 20))
+    RAG_RRF_K = int(os.getenv("RAG_RRF_K", 60))
+
+    # Rerank kandidat dengan cross-encoder di bawah anggaran waktu (ms)
+    RAG_RERANK_ENABLED = os.getenv("RAG_RERANK_ENABLED", "False").lower() == "true"
+    RAG_RERANK_MODEL = os.getenv("RAG_RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+    RAG_RERANK_CANDIDATES = int(os.getenv("RAG_RERANK_CANDIDATES", 20))
+    RAG_RERANK_BUDGET_MS = float(os.getenv("RAG_RERANK_BUDGET_MS", 150))
+    RAG_RERANK_BATCH_SIZE = int(os.getenv("RAG_RERANK_BATCH_SIZE", 8))
+
+    # Dedup chunk saat indexing: hash persis + MinHash near-duplicate (ambang Jaccard)
+    RAG_DEDUP_ENABLED = os.getenv("RAG_DEDUP_ENABLED", "True").lower() == "true"
+    RAG_DEDUP_THRESHOLD = float(os.getenv("RAG_DEDUP_THRESHOLD", 0.85))
+
+    # Blue/green index: query validasi versi baru dan jeda sebelum versi lama dihapus
+    RAG_SMOKE_QUERY = os.getenv("RAG_SMOKE_QUERY", "kesehatan mental")
+    RAG_INDEX_GC_GRACE_SECONDS = float(os.getenv("RAG_INDEX_GC_GRACE_SECONDS", 30))
+
+    # Direktori korpus dokumen RAG (PDF, DOCX, TXT)
+    RAG_CORPUS_DIR = os.getenv("RAG_CORPUS_DIR", os.path.join("common", "data", "corpus"))
+
+    # Chunking berbasis kalimat: ukuran maksimum, overlap, dan satuan ("chars" atau "tokens")
+    RAG_CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", 500))
+    RAG_CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", 80))
+    RAG_CHUNK_UNIT = os.getenv("RAG_CHUNK_UNIT", "chars")
+
+    # Ingestion PDF: jumlah proses paralel (1 = serial) dan jumlah halaman per task
+    KITAB_LOADER_WORKERS = int(os.getenv("KITAB_LOADER_WORKERS", 1))
+    KITAB_PAGES_PER_TASK = int(os.getenv("KITAB_PAGES_PER_TASK", 16))
+
+    # Backend inferensi embedding: "torch", "torch-int8", "onnx", atau "onnx-int8"
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+    # Cek kesamaan (cosine) backend alternatif terhadap PyTorch saat warm-up. Default mati karena
+    # memuat model PyTorch kedua di setiap startup; jalankan sekali dengan `rag_cli.py parity`
+    EMBEDDING_PARITY_CHECK = os.getenv("EMBEDDING_PARITY_CHECK", "False").lower() == "true"
+    EMBEDDING_PARITY_THRESHOLD = float(os.getenv("EMBEDDING_PARITY_THRESHOLD", 0.98))
+
+    # Micro-batching query embedding untuk request chat yang bersamaan
+    EMBED_BATCHING_ENABLED = os.getenv("EMBED_BATCHING_ENABLED", "True").lower() == "true"
+    EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", 16))
+    EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", 5))
+
+    # Cache LRU untuk embedding pertanyaan (TTL dalam detik, 0 = tanpa kedaluwarsa)
+    EMBED_QUERY_CACHE_SIZE = int(os.getenv("EMBED_QUERY_CACHE_SIZE", 2048))
+    EMBED_QUERY_CACHE_TTL = float(os.getenv("EMBED_QUERY_CACHE_TTL", 3600))
+
+    # Penyusunan konteks: anggaran token, MMR (1.0 = relevansi saja), jumlah kandidat,
+    # dan tokenizer HuggingFace model target (kosong = estimasi ~4 karakter per token)
+    RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", 400))
+    RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", 0.5))
+    RAG_MMR_CANDIDATES = int(os.getenv("RAG_MMR_CANDIDATES", 15))
+    RAG_CONTEXT_TOKENIZER = os.getenv("RAG_CONTEXT_TOKENIZER", "")
+
+    # Cache hasil retrieval (context final) per pertanyaan + versi index
+    RAG_CONTEXT_CACHE_SIZE = int(os.getenv("RAG_CONTEXT_CACHE_SIZE", 1024))
+    RAG_CONTEXT_CACHE_TTL = float(os.getenv("RAG_CONTEXT_CACHE_TTL", 3600))
+
+    # Gate topik: klasifikasi embedding terhadap centroid contoh on-topic / off-topic
+    # untuk pertanyaan yang tidak cocok dengan keyword (ditolak sebelum RAG dan LLM)
+    TOPIC_CLASSIFIER_ENABLED = os.getenv("TOPIC_CLASSIFIER_ENABLED", "False").lower() == "true"
+    TOPIC_CLASSIFIER_MIN_SIMILARITY = float(os.getenv("TOPIC_CLASSIFIER_MIN_SIMILARITY", 0.25))
+    TOPIC_CLASSIFIER_MARGIN = float(os.getenv("TOPIC_CLASSIFIER_MARGIN", 0.0))
+
+    # Kesehatan model LLM: jendela N request terakhir per model dan circuit breaker
+    # (terbuka setelah kegagalan beruntun / error rate tinggi, dicoba lagi setelah OPEN_SECONDS)
+    LLM_HEALTH_WINDOW = int(os.getenv("LLM_HEALTH_WINDOW", 100))
+    LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", 0.5))
+    LLM_BREAKER_MIN_REQUESTS = int(os.getenv("LLM_BREAKER_MIN_REQUESTS", 5))
+    LLM_BREAKER_CONSECUTIVE_FAILURES = int(os.getenv("LLM_BREAKER_CONSECUTIVE_FAILURES", 3))
+    LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", 30))
+    # Model dengan latensi p50 di atas batas ini diurutkan setelah model lain yang sehat
+    LLM_SLOW_LATENCY_SECONDS = float(os.getenv("LLM_SLOW_LATENCY_SECONDS", 30))
+
+    # Hedged requests ke model fallback: model berikutnya dijalankan paralel jika model
+    # sebelumnya belum menjawab setelah kuantil latensinya (detik)
+    LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "False").lower() == "true"
+    LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", 0.9))
+    LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", 8.0))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", 1.0))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+    LLM_HEDGE_MAX_IN_FLIGHT = int(os.getenv("LLM_HEDGE_MAX_IN_FLIGHT", 2))
+
+    # Rate limiter global request keluar ke OpenRouter: token bucket (request/detik, burst),
+    # batas request bersamaan, antrean FIFO dengan waktu tunggu maksimal (detik).
+    # 429 / Retry-After menjeda semua pengirim; DEFAULT_PAUSE dipakai jika header tidak ada.
+    # LLM_RATE_LIMIT_PER_SECOND=0 menonaktifkan token bucket (batas concurrency tetap berlaku)
+    LLM_RATE_LIMIT_PER_SECOND = float(os.getenv("LLM_RATE_LIMIT_PER_SECOND", 5.0))
+    LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", 10))
+    LLM_MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", 20))
+    LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", 30.0))
+    LLM_RATE_LIMIT_DEFAULT_PAUSE = float(os.getenv("LLM_RATE_LIMIT_DEFAULT_PAUSE", 2.0))
+    LLM_RATE_LIMIT_MAX_PAUSE = float(os.getenv("LLM_RATE_LIMIT_MAX_PAUSE", 60.0))
+
+    # Cache jawaban semantik: cosine pertanyaan >= threshold dan bucket profil (label kategori) sama.
+    # Saat aktif, profil dikirim ke LLM sebagai label kategori tanpa skor
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true"
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 512))
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 21600))
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+
     # Bot Configuration
     BOT_NAME = "🤖 Chatbot Psiko"
     MAX_CONTEXT_LENGTH = 4000
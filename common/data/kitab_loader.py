@@ -3,42 +3,161 @@ import os
 import fitz  # PyMuPDF
 import logging
 import re
-from typing import List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from common.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Jumlah paragraf awal yang disimpan di singleton sebagai konteks cadangan
+PREVIEW_PARAGRAPHS = 20
+# Format dokumen yang bisa di-ingest ke korpus RAG
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+# Jumlah baris .txt yang dikelompokkan sebagai satu "halaman" saat streaming
+TXT_LINES_PER_PAGE = 200
+
+
+def _clean_line(text: str) -> str:
+    """Normalize whitespace and trim"""
+    if not text:
+        return ""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _extract_page_range(abs_path: str, start: int, stop: int) -> List[Tuple[int, List[str]]]:
+    """Ekstrak paragraf dari halaman [start, stop). Level modul agar bisa dipakai di process pool."""
+    pages = []
+    with fitz.open(abs_path) as doc:
+        for page_no in range(start, stop):
+            text = doc[page_no].get_text()
+            paragraphs = [cleaned for cleaned in (_clean_line(line) for line in text.split('\n')) if cleaned]
+            pages.append((page_no + 1, paragraphs))
+    return pages
+
+
 class KitabLoader:
     def __init__(self):
+        # Hanya cuplikan awal dokumen terakhir, bukan seluruh isi kitab
         self.paragraphs: List[str] = []
 
+    def iter_pdf_pages(self, file_path: str, workers: Optional[int] = None) -> Iterator[Tuple[int, List[str]]]:
+        """
+        Yield (nomor halaman, paragraf bersih) per halaman secara streaming.
+        Jika workers > 1, rentang halaman dibagi ke process pool; urutan halaman tetap terjaga.
+        """
+        abs_path = os.path.abspath(file_path)
+        if not os.path.exists(abs_path):
+            logger.error(f"File {abs_path} not found")
+            return
+
+        workers = settings.KITAB_LOADER_WORKERS if workers is None else workers
+        pages_per_task = max(1, settings.KITAB_PAGES_PER_TASK)
+        with fitz.open(abs_path) as doc:
+            page_count = doc.page_count
+
+        ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+        if workers <= 1 or len(ranges) <= 1:
+            for start, stop in ranges:
+                yield from _extract_page_range(abs_path, start, stop)
+            return
+
+        # Batasi jumlah rentang yang sedang diproses agar pemakaian memori tetap datar
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            remaining = iter(ranges)
+            for start, stop in remaining:
+                pending.append(executor.submit(_extract_page_range, abs_path, start, stop))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                pages = pending.popleft().result()
+                next_range = next(remaining, None)
+                if next_range:
+                    pending.append(executor.submit(_extract_page_range, abs_path, *next_range))
+                yield from pages
+
+    def iter_docx_pages(self, file_path: str) -> Iterator[Tuple[int, List[str]]]:
+        """Yield paragraf .docx sebagai satu halaman (format .docx tidak menyimpan batas halaman)"""
+        from docx import Document  # python-docx
+
+        abs_path = os.path.abspath(file_path)
+        if not os.path.exists(abs_path):
+            logger.error(f"File {abs_path} not found")
+            return
+
+        document = Document(abs_path)
+        paragraphs = [cleaned for cleaned in (_clean_line(p.text) for p in document.paragraphs) if cleaned]
+        for table in document.tables:
+            for row in table.rows:
+                cleaned = _clean_line(" | ".join(cell.text for cell in row.cells))
+                if cleaned:
+                    paragraphs.append(cleaned)
+        yield 1, paragraphs
+
+    def iter_txt_pages(self, file_path: str) -> Iterator[Tuple[int, List[str]]]:
+        """Yield baris .txt yang sudah dibersihkan per blok TXT_LINES_PER_PAGE baris"""
+        abs_path = os.path.abspath(file_path)
+        if not os.path.exists(abs_path):
+            logger.error(f"File {abs_path} not found")
+            return
+
+        page_no, paragraphs = 1, []
+        with open(abs_path, encoding="utf-8", errors="replace") as f:
+            for line_no, line in enumerate(f, start=1):
+                cleaned = _clean_line(line)
+                if cleaned:
+                    paragraphs.append(cleaned)
+                if line_no % TXT_LINES_PER_PAGE == 0:
+                    yield page_no, paragraphs
+                    page_no, paragraphs = page_no + 1, []
+        if paragraphs:
+            yield page_no, paragraphs
+
+    def iter_document_pages(self, file_path: str, workers: Optional[int] = None) -> Iterator[Tuple[int, List[str]]]:
+        """Pilih loader berdasarkan ekstensi file (.pdf, .docx, .txt) dan yield per halaman"""
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension == ".pdf":
+            pages = self.iter_pdf_pages(file_path, workers=workers)
+        elif extension == ".docx":
+            pages = self.iter_docx_pages(file_path)
+        elif extension == ".txt":
+            pages = self.iter_txt_pages(file_path)
+        else:
+            raise ValueError(f"Unsupported document type: {file_path}")
+
+        preview: List[str] = []
+        count = 0
+        for page_no, paragraphs in pages:
+            if len(preview) < PREVIEW_PARAGRAPHS:
+                preview.extend(paragraphs[:PREVIEW_PARAGRAPHS - len(preview)])
+            count += len(paragraphs)
+            yield page_no, paragraphs
+        if preview:
+            self.paragraphs = preview
+        logger.info(f"Loaded {count} paragraphs from {file_path}")
+
+    def iter_document(self, file_path: str, workers: Optional[int] = None) -> Iterator[str]:
+        """Yield cleaned paragraphs dari dokumen apa pun yang didukung"""
+        for _, paragraphs in self.iter_document_pages(file_path, workers=workers):
+            yield from paragraphs
+
+    def iter_pdf(self, file_path: str, workers: Optional[int] = None) -> Iterator[str]:
+        """Yield cleaned paragraphs page by page tanpa menyimpan seluruh dokumen di memori"""
+        return self.iter_document(file_path, workers=workers)
+
     def load_pdf(self, file_path: str) -> List[str]:
         """Load a single .pdf file and return cleaned paragraphs (for psychology/health context)"""
         try:
-            abs_path = os.path.abspath(file_path)
-            if not os.path.exists(abs_path):
-                logger.error(f"File {abs_path} not found")
-                return []
-
-            doc = fitz.open(abs_path)
-            paragraphs = []
-            for page in doc:
-                text = page.get_text()
-                for line in text.split('\n'):
-                    cleaned = self.clean_text(line)
-                    if cleaned:
-                        paragraphs.append(cleaned)
-            logger.info(f"Loaded {len(paragraphs)} paragraphs from {file_path}")
-            self.paragraphs = paragraphs
-            return paragraphs
+            return list(self.iter_pdf(file_path))
         except Exception as e:
             logger.exception(f"Error loading {file_path}: {e}")
             return []
 
     def clean_text(self, text: str) -> str:
         """Normalize whitespace and trim"""
-        if not text:
-            return ""
-        return re.sub(r'\s+', ' ', text).strip()
+        return _clean_line(text)
 
 # singleton
 kitab_loader = KitabLoader()
@@ -0,0 +1,147 @@
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from common.utils.text_utils import TextUtils
+
+# Batas kalimat: tanda baca akhir diikuti spasi
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+SENTENCE_END = ('.', '!', '?')
+# Rata-rata satu dari sekian kalimat menjadi titik potong berbasis isi (content-defined)
+ANCHOR_EVERY = 4
+
+
+@dataclass
+class Chunk:
+    text: str
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+
+    def metadata(self) -> dict:
+        """Metadata halaman yang aman untuk disimpan di vector store (tanpa nilai None)"""
+        meta = {}
+        if self.page_start is not None:
+            meta["page_start"] = self.page_start
+            meta["page_end"] = self.page_end if self.page_end is not None else self.page_start
+        return meta
+
+
+class SentenceChunker:
+    """
+    Chunker linear-time berbasis kalimat.
+    Baris-baris hasil ekstraksi (yang sering memotong kalimat) digabung kembali menjadi
+    kalimat, lalu kalimat dikemas ke dalam chunk sampai batas ukuran (karakter atau token)
+    dengan overlap beberapa kalimat terakhir ke chunk berikutnya.
+    Batas chunk dijangkar agar edit tetap lokal (id chunk berbasis hash isi): packing mulai
+    ulang di setiap halaman baru, dan chunk yang sudah setengah penuh diakhiri di kalimat
+    "jangkar" (hash kalimat % anchor_every == 0), sehingga setelah sebuah edit pemotongan
+    kembali sinkron di jangkar berikutnya dan chunk sesudahnya tidak ikut berubah.
+    """
+
+    def __init__(self, max_size: int = 500, overlap: int = 80, unit: str = "chars", anchor_every: int = ANCHOR_EVERY):
+        if unit not in ("chars", "tokens"):
+            raise ValueError(f"Unknown chunk size unit: {unit}")
+        self.max_size = max(1, max_size)
+        self.overlap = max(0, min(overlap, self.max_size // 2))
+        self.anchor_every = max(1, anchor_every)
+        self.size_fn: Callable[[str], int] = len if unit == "chars" else TextUtils.estimate_tokens
+
+    def chunk_paragraphs(self, paragraphs: Iterable[str]) -> Iterator[Chunk]:
+        """Chunk teks tanpa informasi halaman"""
+        return self.chunk_pages((None, [paragraph]) for paragraph in paragraphs)
+
+    def chunk_pages(self, pages: Iterable[Tuple[Optional[int], List[str]]]) -> Iterator[Chunk]:
+        """Chunk stream (nomor halaman, baris) sambil membawa rentang halaman tiap chunk"""
+        buffer: List[Tuple[str, Optional[int], Optional[int], int]] = []  # (kalimat, hal. awal, hal. akhir, ukuran)
+        buffer_size = 0
+        # Buffer berisi kalimat yang belum pernah dikirim (bukan hanya overlap chunk sebelumnya)
+        fresh = False
+        for sentence, first_page, last_page in self._iter_sentences(pages):
+            if buffer and first_page is not None and first_page != buffer[-1][2]:
+                # Halaman baru: mulai packing ulang tanpa overlap
+                if fresh:
+                    yield self._make_chunk(buffer)
+                buffer, buffer_size, fresh = [], 0, False
+            for piece in self._split_oversized(sentence):
+                size = self.size_fn(piece) + 1
+                if fresh and buffer_size + size > self.max_size:
+                    yield self._make_chunk(buffer)
+                    buffer, buffer_size = self._overlap_tail(buffer, min(self.overlap, self.max_size - size))
+                elif buffer_size + size > self.max_size:
+                    # Sisa overlap tidak muat bersama kalimat berikutnya
+                    buffer, buffer_size = self._overlap_tail(buffer, min(self.overlap, self.max_size - size))
+                buffer.append((piece, first_page, last_page, size))
+                buffer_size += size
+                fresh = True
+                if buffer_size * 2 >= self.max_size and self._is_anchor(piece):
+                    yield self._make_chunk(buffer)
+                    buffer, buffer_size = self._overlap_tail(buffer, self.overlap)
+                    fresh = False
+        if fresh:
+            yield self._make_chunk(buffer)
+
+    def _is_anchor(self, sentence: str) -> bool:
+        return zlib.crc32(sentence.encode("utf-8")) % self.anchor_every == 0
+
+    def _iter_sentences(self, pages) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
+        carry: List[str] = []  # potongan kalimat yang belum selesai
+        carry_size = 0
+        carry_page = None
+        for page, lines in pages:
+            for line in lines:
+                parts = SENTENCE_BOUNDARY.split(line)
+                if not carry:
+                    carry_page = page
+                # Bagian terakhir hanya kalimat utuh jika diakhiri tanda baca akhir
+                tail = parts.pop() if not parts[-1].endswith(SENTENCE_END) else ""
+                for part in parts:
+                    carry.append(part)
+                    yield " ".join(carry), carry_page, page
+                    carry, carry_size, carry_page = [], 0, page
+                if tail:
+                    carry.append(tail)
+                    carry_size += self.size_fn(tail) + 1
+                    # Teks panjang tanpa tanda baca (daftar, tabel) dipaksa jadi satu "kalimat"
+                    if carry_size >= self.max_size:
+                        yield " ".join(carry), carry_page, page
+                        carry, carry_size = [], 0
+        if carry:
+            yield " ".join(carry), carry_page, page
+
+    def _split_oversized(self, sentence: str) -> List[str]:
+        """Pecah kalimat yang lebih besar dari batas chunk di batas kata"""
+        if self.size_fn(sentence) + 1 <= self.max_size:
+            return [sentence]
+        pieces, words, size = [], [], 0
+        for word in sentence.split(" "):
+            word_size = self.size_fn(word) + 1
+            if words and size + word_size > self.max_size:
+                pieces.append(" ".join(words))
+                words, size = [], 0
+            words.append(word)
+            size += word_size
+        if words:
+            pieces.append(" ".join(words))
+        return pieces
+
+    @staticmethod
+    def _overlap_tail(buffer, limit: int):
+        """Kalimat terakhir chunk sebelumnya yang dibawa ke chunk berikutnya"""
+        tail, size = [], 0
+        for item in reversed(buffer):
+            if size + item[3] > limit:
+                break
+            tail.append(item)
+            size += item[3]
+        tail.reverse()
+        return tail, size
+
+    @staticmethod
+    def _make_chunk(buffer) -> Chunk:
+        pages = [page for _, first, last, _ in buffer for page in (first, last) if page is not None]
+        return Chunk(
+            text=" ".join(sentence for sentence, _, _, _ in buffer),
+            page_start=min(pages) if pages else None,
+            page_end=max(pages) if pages else None,
+        )
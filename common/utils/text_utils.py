@@ -4,6 +4,45 @@ from typing import List
 
 logger = logging.getLogger(__name__)
 
+# Batas panjang satu pesan Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Titik potong yang dicoba berurutan: paragraf, baris, akhir kalimat, spasi
+_SPLIT_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+PSIKOLOGI_KEYWORDS = (
+    # Mental health
+    'depresi', 'kecemasan', 'burnout', 'stres', 'stress', 'psikologi', 'psikolog', 'terapi',
+    'kesehatan mental', 'emosi', 'perasaan', 'well-being', 'gangguan', 'distres', 'trauma',
+    'self-care', 'kesejahteraan', 'motivasi', 'intimidasi', 'perundungan', 'bullying',
+    'kesehatan jiwa', 'konseling', 'dukungan', 'pemulihan', 'coping', 'resiliensi',
+    'relaksasi', 'tidur', 'insomnia', 'mood', 'energi', 'kepercayaan diri', 'penghargaan diri',
+    'hubungan sosial', 'interaksi sosial', 'pekerjaan', 'work-life balance',
+    'WHO-5', 'GAD-7', 'MBI', 'NAQ-R', 'K10',
+    # Kesehatan umum
+    'kesehatan', 'nutrisi', 'olahraga', 'diet', 'gizi', 'aktivitas fisik', 'istirahat', 'pola hidup',
+)
+
+
+def _keyword_regex(keyword: str) -> str:
+    """Spasi/tanda hubung fleksibel: "GAD-7" juga cocok dengan "gad 7", "well being" dengan "well-being" """
+    return r"[\s-]+".join(re.escape(part) for part in re.split(r"[\s-]+", keyword))
+
+
+def _alternation(keywords) -> str:
+    return "|".join(_keyword_regex(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+
+
+# Satu regex untuk semua keyword: dicek sekali per pertanyaan, bukan per keyword.
+# Akronim instrumen (MBI, K10, GAD-7, ...) harus berdiri sendiri agar "mbi" di "ambil" tidak
+# cocok; keyword lain dicocokkan sebagai substring seperti sebelumnya sehingga bentuk berimbuhan
+# (berolahraga, tertidur, emosional, psikologis, depresif, stresnya) tetap terdeteksi.
+_PSIKOLOGI_ACRONYMS = tuple(keyword for keyword in PSIKOLOGI_KEYWORDS if keyword.isupper())
+_PSIKOLOGI_PATTERN = re.compile(
+    r"(?<!\w)(?:" + _alternation(_PSIKOLOGI_ACRONYMS) + r")(?!\w)"
+    + r"|" + _alternation(keyword for keyword in PSIKOLOGI_KEYWORDS if keyword not in _PSIKOLOGI_ACRONYMS),
+    re.IGNORECASE,
+)
+
 class TextUtils:
     @staticmethod
     def clean_text(text: str) -> str:
@@ -15,24 +54,27 @@ class TextUtils:
         text = re.sub(r'\s+', ' ', text)
         return text.strip()
     
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Perkiraan kasar jumlah token (~4 karakter per token)"""
+        if not text:
+            return 0
+        return max(1, (len(text) + 3) // 4)
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Normalisasi pertanyaan untuk dipakai sebagai kunci cache"""
+        if not question:
+            return ""
+        return re.sub(r'\s+', ' ', question).strip().lower().rstrip('?!.,; ')
+
     @staticmethod
     def is_psikologi_related(question: str) -> bool:
         """Check if question is related to psychology/mental health topics"""
-        psikologi_keywords = [
-            # Mental health
-            'depresi', 'kecemasan', 'burnout', 'stres', 'stress', 'psikologi', 'psikolog', 'terapi',
-            'kesehatan mental', 'emosi', 'perasaan', 'well-being', 'gangguan', 'distres', 'trauma',
-            'self-care', 'kesejahteraan', 'motivasi', 'intimidasi', 'perundungan', 'bullying',
-            'kesehatan jiwa', 'konseling', 'dukungan', 'pemulihan', 'coping', 'resiliensi',
-            'relaksasi', 'tidur', 'insomnia', 'mood', 'energi', 'kepercayaan diri', 'penghargaan diri',
-            'hubungan sosial', 'interaksi sosial', 'pekerjaan', 'work-life balance', 'burnout',
-            'WHO-5', 'GAD-7', 'MBI', 'NAQ-R', 'K10',
-            # Kesehatan umum
-            'kesehatan', 'nutrisi', 'olahraga', 'diet', 'gizi', 'aktivitas fisik', 'istirahat', 'pola hidup',
-        ]
-        question_lower = question.lower()
-        return any(keyword in question_lower for keyword in psikologi_keywords)
-    
+        if not question:
+            return False
+        return _PSIKOLOGI_PATTERN.search(question) is not None
+
     @staticmethod
     def format_response(text: str) -> str:
         """Format the response text for better readability"""
@@ -44,4 +86,59 @@ class TextUtils:
         if not text.endswith(('.', '!', '?')):
             text += '.'
             
-        return text
\ No newline at end of file
+        return text
+
+    @staticmethod
+    def is_markdown_balanced(text: str) -> bool:
+        """Penanda Markdown Telegram (*, _, `, ```) berpasangan semua"""
+        without_fences = text.replace("```", "")
+        return (
+            text.count("```") % 2 == 0
+            and without_fences.count("`") % 2 == 0
+            and without_fences.count("*") % 2 == 0
+            and without_fences.count("_") % 2 == 0
+        )
+
+    @staticmethod
+    def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+        """
+        Pecah teks panjang menjadi beberapa pesan <= limit karakter.
+        Dipotong di batas paragraf/baris/kalimat/kata, diutamakan titik potong yang tidak
+        memutus penanda Markdown; blok kode yang terpotong ditutup lalu dibuka lagi di
+        pesan berikutnya.
+        """
+        parts: List[str] = []
+        remaining = (text or "").strip()
+        open_fence = False
+        while remaining:
+            prefix = "```\n" if open_fence else ""
+            if len(prefix) + len(remaining) <= limit:
+                parts.append(prefix + remaining)
+                break
+
+            budget = limit - len(prefix) - len("\n```")
+            cut = TextUtils._split_point(remaining, budget, prefix)
+            chunk = prefix + remaining[:cut].rstrip()
+            remaining = remaining[cut:].lstrip()
+            open_fence = chunk.count("```") % 2 == 1
+            if open_fence:
+                chunk += "\n```"
+            parts.append(chunk)
+        return parts
+
+    @staticmethod
+    def _split_point(text: str, budget: int, prefix: str = "") -> int:
+        window = text[:budget]
+        candidates = []
+        for separator in _SPLIT_SEPARATORS:
+            position = window.rfind(separator)
+            # Potongan terlalu pendek hanya dipakai jika tidak ada pilihan lain
+            while position > budget // 4:
+                candidates.append(position + len(separator))
+                position = window.rfind(separator, 0, position)
+        for cut in candidates:
+            piece = prefix + text[:cut]
+            # Blok kode boleh terbuka (ditutup otomatis); penanda inline harus berpasangan
+            if TextUtils.is_markdown_balanced(piece.replace("```", "")):
+                return cut
+        return candidates[0] if candidates else budget
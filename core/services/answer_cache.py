@@ -0,0 +1,99 @@
+# src/services/answer_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Cache jawaban LLM berbasis kemiripan semantik pertanyaan.
+    Entri = (embedding pertanyaan, bucket profil, jawaban). Lookup mengembalikan
+    jawaban entri dengan cosine tertinggi di bucket yang sama jika >= threshold.
+    Seluruh isi cache dibuang saat fingerprint (versi index + system prompt) berubah.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = None, threshold: float = 0.95):
+        self.maxsize = maxsize
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.threshold = threshold
+        self.fingerprint: Optional[str] = None
+        # id -> (bucket, embedding ter-normalisasi, jawaban, expires_at), urutan LRU
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _check_fingerprint(self, fingerprint: str):
+        """Harus dipanggil dengan lock dipegang"""
+        if fingerprint != self.fingerprint:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.fingerprint = fingerprint
+
+    def get(self, embedding: Sequence[float], bucket: str, fingerprint: str) -> Optional[str]:
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            expired = [key for key, entry in self._entries.items() if entry[3] is not None and entry[3] <= now]
+            for key in expired:
+                del self._entries[key]
+
+            candidates = [(key, entry) for key, entry in self._entries.items() if entry[0] == bucket]
+            if candidates:
+                scores = np.stack([entry[1] for _, entry in candidates]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+            self.misses += 1
+            return None
+
+    def set(self, embedding: Sequence[float], bucket: str, fingerprint: str, answer: str):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._entries[self._next_id] = (bucket, self._normalize(embedding), answer, expires_at)
+            self._next_id += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,120 @@
+# src/services/chunk_dedup.py
+import hashlib
+import zlib
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from common.utils.text_utils import TextUtils
+from core.services.lexical_index import tokenize
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+@dataclass
+class DroppedChunk:
+    id: str
+    source: Optional[str]
+    duplicate_of: str
+    reason: str  # "exact" atau "near"
+    similarity: float
+    preview: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ChunkDeduplicator:
+    """
+    Deteksi chunk duplikat saat indexing: hash persis dari teks yang dinormalisasi,
+    lalu MinHash + LSH banding atas shingle kata untuk near-duplicate (header, footer,
+    paragraf boilerplate yang berulang di banyak halaman).
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16, shingle_size: int = 3, seed: int = 7):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # Koefisien < 2^31 agar a * x (x < 2^32) tidak overflow di uint64
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        self._exact: Dict[str, str] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = defaultdict(list)
+
+    def add_reference(self, chunks: Iterable[Tuple[str, str]]):
+        """Daftarkan chunk yang sudah ada di index (tidak akan pernah di-drop)"""
+        for chunk_id, text in chunks:
+            self._register(chunk_id, text, self._signature(text))
+
+    def deduplicate(self, chunks: Dict[str, Tuple[str, dict]]) -> Tuple[Dict[str, Tuple[str, dict]], List[DroppedChunk]]:
+        """Kembalikan (chunk yang dipertahankan, laporan chunk yang di-drop) sesuai urutan input"""
+        kept, dropped = {}, []
+        for chunk_id, (text, metadata) in chunks.items():
+            exact_key = self._exact_key(text)
+            source = metadata.get("source")
+            if exact_key in self._exact:
+                dropped.append(DroppedChunk(chunk_id, source, self._exact[exact_key], "exact", 1.0, text[:120]))
+                continue
+
+            signature = self._signature(text)
+            match, similarity = self._best_match(signature)
+            if match is not None:
+                dropped.append(DroppedChunk(chunk_id, source, match, "near", round(similarity, 4), text[:120]))
+                continue
+
+            self._register(chunk_id, text, signature)
+            kept[chunk_id] = (text, metadata)
+        return kept, dropped
+
+    @staticmethod
+    def _exact_key(text: str) -> str:
+        return hashlib.sha1(TextUtils.clean_text(text).lower().encode("utf-8")).hexdigest()
+
+    def _register(self, chunk_id: str, text: str, signature: Optional[np.ndarray]):
+        self._exact.setdefault(self._exact_key(text), chunk_id)
+        if signature is None:
+            return
+        self._signatures[chunk_id] = signature
+        for band, key in self._band_keys(signature):
+            self._buckets[(band, key)].append(chunk_id)
+
+    def _signature(self, text: str) -> Optional[np.ndarray]:
+        tokens = tokenize(text)
+        if len(tokens) < self.shingle_size:
+            return None  # terlalu pendek untuk shingle; cukup dicek dengan hash persis
+        shingles = {
+            zlib.crc32(" ".join(tokens[i:i + self.shingle_size]).encode("utf-8"))
+            for i in range(len(tokens) - self.shingle_size + 1)
+        }
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        hashed = (values[None, :] * self._a[:, None] + self._b[:, None]) % _MERSENNE_PRIME
+        return (hashed & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _best_match(self, signature: Optional[np.ndarray]) -> Tuple[Optional[str], float]:
+        if signature is None:
+            return None, 0.0
+        best_id, best_similarity = None, 0.0
+        seen = set()
+        for band, key in self._band_keys(signature):
+            for candidate in self._buckets.get((band, key), ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                similarity = float(np.mean(self._signatures[candidate] == signature))
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best_id, best_similarity = candidate, similarity
+        return best_id, best_similarity
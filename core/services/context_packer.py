@@ -0,0 +1,165 @@
+# src/services/context_packer.py
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from common.utils.text_utils import TextUtils
+from core.services.vector_store import SearchHit
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ContextResult:
+    """Konteks yang dikirim ke LLM beserta passage (dan sumbernya) yang dipakai"""
+    text: str = ""
+    passages: List[SearchHit] = field(default_factory=list)
+    tokens: int = 0
+
+    @property
+    def passage_ids(self) -> List[str]:
+        return [hit.id for hit in self.passages]
+
+    @property
+    def sources(self) -> List[dict]:
+        return [
+            {
+                "label": f"[{number}]",
+                "id": hit.id,
+                "source": hit.metadata.get("source"),
+                "page_start": hit.metadata.get("page_start"),
+                "page_end": hit.metadata.get("page_end"),
+            }
+            for number, hit in enumerate(self.passages, start=1)
+        ]
+
+
+def passage_label(number: int, hit: SearchHit) -> str:
+    """Label sitasi passage, mis. "[2] (burnout.pdf, hlm. 4-5)" """
+    source = hit.metadata.get("source")
+    page_start, page_end = hit.metadata.get("page_start"), hit.metadata.get("page_end")
+    details = []
+    if source:
+        details.append(str(source))
+    if page_start:
+        details.append(f"hlm. {page_start}" if page_end in (None, page_start) else f"hlm. {page_start}-{page_end}")
+    return f"[{number}] ({', '.join(details)})" if details else f"[{number}]"
+
+
+def render_passage(number: int, hit: SearchHit) -> str:
+    return f"{passage_label(number, hit)}\n{hit.text}"
+
+
+class ContextPacker:
+    """
+    Susun konteks di bawah anggaran token dengan Maximal Marginal Relevance:
+    setiap langkah memilih passage dengan lambda * relevansi - (1 - lambda) * kemiripan
+    maksimum terhadap passage yang sudah dipilih, sehingga passage yang hampir sama
+    tidak menghabiskan anggaran. Token dihitung dengan tokenizer HuggingFace bila
+    dikonfigurasi, selain itu dengan TextUtils.estimate_tokens.
+    """
+
+    def __init__(self, token_budget: int, mmr_lambda: float = 0.5, tokenizer_name: Optional[str] = None):
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.tokenizer_name = tokenizer_name or None
+        self._tokenizer = None
+        self._tokenizer_failed = False
+        self._tokenizer_lock = threading.Lock()
+
+    @property
+    def tokenizer(self):
+        if self.tokenizer_name and self._tokenizer is None and not self._tokenizer_failed:
+            with self._tokenizer_lock:
+                if self._tokenizer is None and not self._tokenizer_failed:
+                    try:
+                        from transformers import AutoTokenizer
+
+                        self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                        logger.info(f"Context tokenizer '{self.tokenizer_name}' loaded successfully.")
+                    except Exception as e:
+                        # Tetap jalan dengan estimasi karakter jika tokenizer tidak tersedia
+                        self._tokenizer_failed = True
+                        logger.warning(f"Failed to load tokenizer '{self.tokenizer_name}', using estimate: {e}")
+        return self._tokenizer
+
+    def count_tokens(self, text: str) -> int:
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            return TextUtils.estimate_tokens(text)
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            return text[:max_tokens * 4]
+        token_ids = tokenizer.encode(text, add_special_tokens=False)[:max_tokens]
+        return tokenizer.decode(token_ids)
+
+    def pack(self, hits: Sequence[SearchHit], embeddings: Optional[np.ndarray], max_passages: int,
+             token_budget: Optional[int] = None) -> ContextResult:
+        """
+        Pilih passage dari kandidat terurut (hits) dengan MMR selama muat di anggaran token.
+        Relevansi diambil dari urutan hits (hasil fusi RRF / rerank cross-encoder), bukan
+        cosine ulang ke query, agar passage yang hanya ditemukan BM25 tidak tersingkir.
+        embeddings: matriks embedding kandidat (baris sejajar dengan hits) untuk suku
+        redundansi, atau None untuk memakai urutan relevansi saja.
+        """
+        budget = token_budget or self.token_budget
+        if not hits:
+            return ContextResult()
+
+        matrix = self._normalized(embeddings, len(hits))
+        relevance = self._relevance(hits)
+        similarity = matrix @ matrix.T if matrix is not None else np.zeros((len(hits), len(hits)), dtype=np.float32)
+
+        selected: List[int] = []
+        remaining = list(range(len(hits)))
+        used = 0
+        while remaining and len(selected) < max_passages:
+            best, best_score = None, None
+            for position in remaining:
+                redundancy = max((similarity[position, chosen] for chosen in selected), default=0.0)
+                score = self.mmr_lambda * relevance[position] - (1 - self.mmr_lambda) * redundancy
+                if best_score is None or score > best_score:
+                    best, best_score = position, score
+            remaining.remove(best)
+
+            size = self.count_tokens(render_passage(len(selected) + 1, hits[best])) + (1 if selected else 0)
+            if used + size <= budget:
+                selected.append(best)
+                used += size
+
+        if not selected:
+            # Tidak ada passage yang muat utuh: potong passage teratas agar tetap ada konteks
+            top = hits[0]
+            header = passage_label(1, top)
+            text = self.truncate(top.text, max(0, budget - self.count_tokens(header) - 1))
+            passage = SearchHit(id=top.id, text=text, metadata=top.metadata, score=top.score)
+            context = f"{header}\n{text}"
+            return ContextResult(text=context, passages=[passage], tokens=self.count_tokens(context))
+
+        passages = [hits[position] for position in selected]
+        context = "\n\n".join(render_passage(number, hit) for number, hit in enumerate(passages, start=1))
+        return ContextResult(text=context, passages=passages, tokens=used)
+
+    @staticmethod
+    def _relevance(hits: Sequence[SearchHit]) -> np.ndarray:
+        """
+        Relevansi dari peringkat: 1 untuk hit teratas turun linear ke 1/n. Skor cosine, RRF,
+        dan cross-encoder tidak sebanding, dan normalisasi min-max memperbesar selisih kecil
+        sehingga suku redundansi MMR kalah oleh duplikat passage teratas.
+        """
+        count = len(hits)
+        return 1.0 - np.arange(count, dtype=np.float32) / count
+
+    @staticmethod
+    def _normalized(embeddings: Optional[np.ndarray], count: int) -> Optional[np.ndarray]:
+        if embeddings is None or len(embeddings) != count:
+            return None
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
@@ -0,0 +1,98 @@
+# src/services/embedding_batcher.py
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching untuk query embedding.
+    Query yang datang dalam jendela waktu singkat dikumpulkan lalu di-encode
+    dalam satu panggilan, kemudian vektornya dikembalikan ke masing-masing pemanggil.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], Sequence[List[float]]],
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self._encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        """Masukkan satu query ke antrian batch, kembalikan Future berisi vektornya."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        """Encode satu query lewat batcher dan tunggu hasilnya."""
+        return self.submit(text).result(timeout=timeout)
+
+    def close(self):
+        """Hentikan worker thread (query yang sudah mengantri tetap diproses)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                self._queue.put(_STOP)
+                self._thread.join(timeout=5)
+            self._thread = None
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Kembalikan sinyal stop agar loop utama berhenti setelah batch ini
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = self._collect_batch(first)
+            # Abaikan caller yang sudah membatalkan future-nya
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self._encode_fn(texts)
+            except Exception as e:
+                logger.error(f"Batch embedding failed for {len(texts)} queries: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            logger.debug(f"Encoded embedding batch of size {len(texts)}")
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
@@ -0,0 +1,80 @@
+# src/services/lexical_index.py
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from core.services.vector_store import SearchHit
+
+# Token: huruf/angka, boleh disambung tanda hubung agar "GAD-7", "NAQ-R", "K10" tetap utuh
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:-[^\W_]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class BM25Index:
+    """
+    Inverted index in-memory dengan skor BM25.
+    Melengkapi retrieval vektor untuk istilah klinis, singkatan kuesioner, dan nama obat
+    yang sering tidak tertangkap oleh model embedding.
+    """
+
+    def __init__(self, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[dict],
+                 k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = [m or {} for m in metadatas]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+
+        for position, document in enumerate(self.documents):
+            tokens = tokenize(document)
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((position, tf))
+
+        count = len(self.documents)
+        self.avg_doc_length = (sum(self.doc_lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, n_results: int) -> List[SearchHit]:
+        scores: Dict[int, float] = defaultdict(float)
+        avg_length = self.avg_doc_length or 1.0
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for position, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / avg_length)
+                scores[position] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+        return [
+            SearchHit(id=self.ids[p], text=self.documents[p], metadata=self.metadatas[p], score=score)
+            for p, score in ranked
+        ]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[SearchHit]], k: int = 60) -> List[SearchHit]:
+    """Gabungkan beberapa ranking dengan RRF; skor hasil = jumlah 1 / (k + peringkat)"""
+    fused: Dict[str, float] = defaultdict(float)
+    hits: Dict[str, SearchHit] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            fused[hit.id] += 1.0 / (k + rank)
+            hits.setdefault(hit.id, hit)
+    ordered = sorted(fused, key=fused.get, reverse=True)
+    return [
+        SearchHit(id=hit_id, text=hits[hit_id].text, metadata=hits[hit_id].metadata, score=fused[hit_id])
+        for hit_id in ordered
+    ]
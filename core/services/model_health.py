@@ -0,0 +1,161 @@
+# src/services/model_health.py
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# Status circuit breaker per model
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ModelHealth:
+    """Jendela bergulir hasil request satu model + status circuit breaker-nya"""
+
+    def __init__(self, window: int):
+        # (sukses, latensi detik) untuk N request terakhir
+        self.outcomes: deque = deque(maxlen=window)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for ok, _ in self.outcomes if not ok) / len(self.outcomes)
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        latencies = sorted(latency for ok, latency in self.outcomes if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def success_count(self) -> int:
+        return sum(1 for ok, _ in self.outcomes if ok)
+
+
+class ModelHealthTracker:
+    """
+    Pelacak kesehatan per model: error rate dan latensi p50/p95 dari N request terakhir,
+    plus circuit breaker closed -> open -> half_open -> closed.
+    Breaker terbuka setelah `consecutive_failures` kegagalan berturut-turut atau error rate
+    >= `error_rate_threshold` (minimal `min_requests` request); setelah `open_seconds`
+    satu request percobaan (half-open) diizinkan, sukses menutup breaker, gagal membukanya lagi.
+    """
+
+    def __init__(self, window: int = 100, error_rate_threshold: float = 0.5, min_requests: int = 5,
+                 consecutive_failures: int = 3, open_seconds: float = 30.0, slow_latency: Optional[float] = None):
+        self.window = window
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.consecutive_failures = consecutive_failures
+        self.open_seconds = open_seconds
+        self.slow_latency = slow_latency
+        self._models: Dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def _health(self, model: str) -> ModelHealth:
+        health = self._models.get(model)
+        if health is None:
+            health = self._models[model] = ModelHealth(self.window)
+        return health
+
+    def _refresh(self, health: ModelHealth):
+        """open -> half_open setelah masa tunggu habis (lock dipegang)"""
+        if health.state == OPEN and time.monotonic() - health.opened_at >= self.open_seconds:
+            health.state = HALF_OPEN
+            health.probe_in_flight = False
+
+    def is_available(self, model: str) -> bool:
+        """Boleh dicoba saat ini (tanpa mengklaim slot percobaan half-open)"""
+        with self._lock:
+            health = self._health(model)
+            self._refresh(health)
+            return health.state == CLOSED or (health.state == HALF_OPEN and not health.probe_in_flight)
+
+    def acquire(self, model: str) -> bool:
+        """Klaim izin mengirim request; pada half-open hanya satu request percobaan sekaligus"""
+        with self._lock:
+            health = self._health(model)
+            self._refresh(health)
+            if health.state == CLOSED:
+                return True
+            if health.state == HALF_OPEN and not health.probe_in_flight:
+                health.probe_in_flight = True
+                return True
+            return False
+
+    def release(self, model: str):
+        """Request dibatalkan sebelum ada hasil (mis. kalah hedging): lepas slot percobaan"""
+        with self._lock:
+            self._health(model).probe_in_flight = False
+
+    def record_success(self, model: str, latency: float):
+        with self._lock:
+            health = self._health(model)
+            if health.state == HALF_OPEN:
+                # Pulih: mulai jendela baru agar kegagalan lama tidak langsung membuka breaker lagi
+                health.outcomes.clear()
+            health.outcomes.append((True, latency))
+            health.state = CLOSED
+            health.consecutive_failures = 0
+            health.opened_at = None
+            health.probe_in_flight = False
+
+    def record_failure(self, model: str, latency: float):
+        with self._lock:
+            health = self._health(model)
+            health.outcomes.append((False, latency))
+            health.consecutive_failures += 1
+            health.probe_in_flight = False
+            tripped = (
+                health.state == HALF_OPEN
+                or health.consecutive_failures >= self.consecutive_failures
+                or (len(health.outcomes) >= self.min_requests and health.error_rate >= self.error_rate_threshold)
+            )
+            if tripped and health.state != OPEN:
+                health.state = OPEN
+                health.opened_at = time.monotonic()
+
+    def latency_quantile(self, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            health = self._health(model)
+            if health.success_count() < min_samples:
+                return None
+            return health.latency_quantile(q)
+
+    def order(self, models: List[str]) -> List[str]:
+        """
+        Model yang tersedia, diurutkan dari yang paling sehat: closed sebelum half-open,
+        lalu error rate terendah (dibulatkan per 10%), lalu model yang p50-nya tidak melewati
+        slow_latency. Urutan asal (preferensi) dipakai sebagai penentu terakhir, sehingga
+        model default tetap didahulukan selama sehat.
+        """
+        available = [model for model in models if self.is_available(model)]
+        with self._lock:
+            def key(item):
+                position, model = item
+                health = self._health(model)
+                p50 = health.latency_quantile(0.5)
+                slow = self.slow_latency is not None and p50 is not None and p50 > self.slow_latency
+                return (health.state != CLOSED, round(health.error_rate, 1), slow, position)
+            return [model for _, model in sorted(enumerate(available), key=key)]
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            report = {}
+            for model, health in self._models.items():
+                self._refresh(health)
+                p50, p95 = health.latency_quantile(0.5), health.latency_quantile(0.95)
+                report[model] = {
+                    "state": health.state,
+                    "requests": len(health.outcomes),
+                    "error_rate": round(health.error_rate, 4),
+                    "consecutive_failures": health.consecutive_failures,
+                    "latency_p50_s": round(p50, 3) if p50 is not None else None,
+                    "latency_p95_s": round(p95, 3) if p95 is not None else None,
+                }
+            return report
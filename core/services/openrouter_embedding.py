@@ -1,32 +1,163 @@
 # src/services/huggingface_embedding.py
 import logging
+import threading
+from typing import List
 from chromadb.utils.embedding_functions import EmbeddingFunction
 from chromadb.api.types import Documents, Embeddings
-from sentence_transformers import SentenceTransformer
+from common.config.settings import settings
+from common.utils.lru_cache import LRUCache
+from common.utils.text_utils import TextUtils
+from core.services.embedding_batcher import EmbeddingBatcher
 
 logger = logging.getLogger(__name__)
 
+# Backend inferensi yang didukung untuk model embedding
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Sampel pertanyaan untuk membandingkan backend alternatif dengan PyTorch
+PARITY_SAMPLES = [
+    "apa itu burnout",
+    "cara mengatasi stres kerja sebagai perawat",
+    "gejala kecemasan menurut GAD-7",
+    "bagaimana menjaga kualitas tidur setelah shift malam",
+    "apa yang harus dilakukan jika mengalami perundungan di tempat kerja",
+    "tips menjaga kesehatan mental",
+    "arti skor K10 yang tinggi",
+    "bagaimana cara meminta dukungan dari rekan kerja",
+]
+
 class HuggingFaceEmbeddingFunction(EmbeddingFunction):
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", backend: str = None):
         """
         Embedding function using HuggingFace SentenceTransformer.
         Default model: all-MiniLM-L6-v2 (ringan & cepat).
+        Model baru dimuat saat pertama kali dipakai (atau saat warm-up), bukan saat import.
+        Backend: "torch" (default), "torch-int8" (dynamic quantization), "onnx", atau "onnx-int8".
         """
+        self.model_name = model_name
+        self.backend = (backend or settings.EMBEDDING_BACKEND).lower()
+        if self.backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND: {self.backend}")
+        self._model = None
+        self._model_lock = threading.Lock()
+
+        # Batcher untuk query tunggal dari request chat yang datang bersamaan
+        self.batcher = EmbeddingBatcher(
+            self._encode,
+            max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBED_BATCH_MAX_WAIT_MS
+        )
+        # Cache embedding pertanyaan yang sering diulang, kunci = teks yang dinormalisasi
+        self.query_cache = LRUCache(
+            maxsize=settings.EMBED_QUERY_CACHE_SIZE,
+            ttl=settings.EMBED_QUERY_CACHE_TTL
+        )
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def _load_model(self):
         try:
-            self.model = SentenceTransformer(model_name)
-            logger.info(f"HuggingFace model '{model_name}' loaded successfully.")
+            model = self._load_backend(self.backend)
+            logger.info(f"HuggingFace model '{self.model_name}' loaded successfully (backend: {self.backend}).")
+            return model
         except Exception as e:
             logger.error(f"Failed to load HuggingFace model: {str(e)}")
             raise
 
+    def _load_backend(self, backend: str):
+        from sentence_transformers import SentenceTransformer
+
+        if backend == "onnx":
+            return SentenceTransformer(self.model_name, backend="onnx")
+        if backend == "onnx-int8":
+            # Bobot int8 hasil kuantisasi ONNX Runtime yang disediakan di repo model
+            return SentenceTransformer(
+                self.model_name,
+                backend="onnx",
+                model_kwargs={"file_name": settings.EMBEDDING_ONNX_INT8_FILE}
+            )
+
+        model = SentenceTransformer(self.model_name, device="cpu" if backend == "torch-int8" else None)
+        if backend == "torch-int8":
+            import torch
+
+            # Dynamic quantization: layer Linear dijalankan dengan bobot int8 di CPU
+            torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        return model
+
+    def check_parity(self, samples: List[str] = None) -> dict:
+        """
+        Bandingkan embedding backend aktif dengan PyTorch penuh (cosine per sampel).
+        Mengembalikan ringkasan min/mean cosine dan apakah lolos EMBEDDING_PARITY_THRESHOLD.
+        """
+        import numpy as np
+
+        samples = samples or PARITY_SAMPLES
+        reference = self._load_backend("torch").encode(samples, convert_to_numpy=True)
+        candidate = np.asarray(self.model.encode(samples, convert_to_numpy=True))
+
+        reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+        candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+        cosines = np.sum(reference * candidate, axis=1)
+
+        report = {
+            "backend": self.backend,
+            "samples": len(samples),
+            "min_cosine": round(float(cosines.min()), 6),
+            "mean_cosine": round(float(cosines.mean()), 6),
+            "threshold": settings.EMBEDDING_PARITY_THRESHOLD,
+        }
+        report["passed"] = report["min_cosine"] >= settings.EMBEDDING_PARITY_THRESHOLD
+        return report
+
+    def warm_up(self):
+        """Muat model dan jalankan satu encode agar request pertama tidak menanggung biaya load"""
+        self._encode([settings.RAG_SMOKE_QUERY])
+        if self.backend != "torch" and settings.EMBEDDING_PARITY_CHECK:
+            report = self.check_parity()
+            if report["passed"]:
+                logger.info(f"Embedding parity check passed: {report}")
+            else:
+                logger.warning(f"Embedding parity check below threshold: {report}")
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, convert_to_numpy=True).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embedding banyak dokumen sekaligus untuk indexing (error dilempar, bukan diganti list kosong)"""
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embedding satu pertanyaan (cache LRU, lalu micro-batching bila diaktifkan)"""
+        key = TextUtils.normalize_question(text)
+        embedding = self.query_cache.get(key)
+        if embedding is not None:
+            return embedding
+
+        if settings.EMBED_BATCHING_ENABLED:
+            embedding = self.batcher.embed(key)
+        else:
+            embedding = self._encode([key])[0]
+        self.query_cache.set(key, embedding)
+        return embedding
+
     def __call__(self, input: Documents) -> Embeddings:
         """Generate embeddings for a list of texts using HuggingFace model"""
         if isinstance(input, str):
             input = [input]  # pastikan input selalu list
 
         try:
-            embeddings = self.model.encode(input, convert_to_numpy=True).tolist()
-            return embeddings
+            return self._encode(input)
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
             # fallback: kembalikan list kosong dengan panjang sesuai input
@@ -1,18 +1,51 @@
 # src/services/openrouter_service.py
+import hashlib
 import httpx
+import json
 import logging
 import os
 import sys
 import asyncio
-from typing import Optional, Dict
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Dict, List, Tuple
 
 from common.config.settings import settings
 from common.utils.text_utils import TextUtils
 from common.data.kitab_loader import kitab_loader
+from core.services.answer_cache import SemanticAnswerCache
+from core.services.model_health import ModelHealthTracker
+from core.services.rate_limiter import OutboundRateLimiter, RateLimited, RateLimitTimeout
 from core.services.rag_service import rag_service
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """
+Kamu adalah Chatbot Psikologi dan Kesehatan yang membantu user memahami isu-isu psikologi, kesehatan mental, dan kesejahteraan.
+
+Aturan menjawab:
+1. Jika pertanyaan sesuai dengan konteks psikologi atau kesehatan, jawab berdasarkan data yang sudah dimuat dari kitab.pdf.
+2. Jika pertanyaan tidak murni psikologi/kesehatan, tapi ada jawaban relevan di kitab.pdf, tetap jawab dengan jelas.
+3. Jika pertanyaan benar-benar di luar konteks data, jawab dengan sopan bahwa bot ini hanya fokus pada psikologi dan kesehatan sesuai data yang tersedia.
+4. Sertakan sumber jika jawaban diambil dari kitab: setiap passage konteks diawali label seperti [1] (nama file, halaman); kutip label tersebut di kalimat yang memakainya.
+5. PENTING: Sesuaikan gaya bahasa dan kedalaman penjelasan dengan profil user yang diberikan (hasil survey WHO-5, GAD-7, MBI, NAQ-R, K10).
+"""
+
+OFF_TOPIC_ANSWER = "Maaf, saya hanya bisa menjawab pertanyaan seputar Psikologi atau konten yang ada di kitab yang tersedia."
+UNAVAILABLE_ANSWER = "Maaf, saat ini tidak dapat terhubung ke AI service. Silakan coba lagi nanti."
+ERROR_ANSWER = "Maaf, terjadi kesalahan sistem. Silakan coba lagi."
+
+# Bucket risiko profil untuk cache jawaban, diurutkan dari paling ringan
+RISK_BUCKETS = ("rendah", "ringan", "sedang", "tinggi")
+
+@dataclass
+class PreparedQuestion:
+    """Hasil langkah sebelum LLM; `answer` terisi jika LLM tidak perlu dipanggil"""
+    answer: Optional[str] = None
+    cache_key: Optional[tuple] = None
+    kitab_context: str = ""
+    profile_context: str = ""
+
 class OpenRouterService:
     def __init__(self):
         self.api_key = settings.OPENROUTER_API_KEY
@@ -26,6 +59,67 @@ class OpenRouterService:
         ]
         self.default_model = "deepseek/deepseek-r1"
 
+        # Cache jawaban semantik untuk pertanyaan yang sering diulang
+        self.answer_cache = SemanticAnswerCache(
+            maxsize=settings.ANSWER_CACHE_SIZE,
+            ttl=settings.ANSWER_CACHE_TTL,
+            threshold=settings.ANSWER_CACHE_THRESHOLD
+        ) if settings.ANSWER_CACHE_ENABLED else None
+
+        # Satu AsyncClient per proses (pool koneksi + keep-alive), dibuat di lifespan FastAPI
+        self._client: Optional[httpx.AsyncClient] = None
+        # Kesehatan per model (error rate, latensi, circuit breaker) untuk routing dan hedging
+        self.model_health = ModelHealthTracker(
+            window=settings.LLM_HEALTH_WINDOW,
+            error_rate_threshold=settings.LLM_BREAKER_ERROR_RATE,
+            min_requests=settings.LLM_BREAKER_MIN_REQUESTS,
+            consecutive_failures=settings.LLM_BREAKER_CONSECUTIVE_FAILURES,
+            open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+            slow_latency=settings.LLM_SLOW_LATENCY_SECONDS
+        )
+        # Rate limiter global untuk semua request keluar ke OpenRouter (termasuk streaming)
+        self.rate_limiter = OutboundRateLimiter(
+            rate=settings.LLM_RATE_LIMIT_PER_SECOND,
+            burst=settings.LLM_RATE_LIMIT_BURST,
+            max_concurrency=settings.LLM_MAX_CONCURRENT_REQUESTS,
+            max_wait=settings.LLM_RATE_LIMIT_MAX_WAIT,
+            default_pause=settings.LLM_RATE_LIMIT_DEFAULT_PAUSE,
+            max_pause=settings.LLM_RATE_LIMIT_MAX_PAUSE
+        )
+
+    def _create_client(self) -> httpx.AsyncClient:
+        http2 = settings.OPENROUTER_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("OPENROUTER_HTTP2 enabled but package 'h2' is not installed, using HTTP/1.1")
+                http2 = False
+        limits = httpx.Limits(
+            max_connections=settings.OPENROUTER_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENROUTER_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENROUTER_KEEPALIVE_EXPIRY
+        )
+        logger.info(f"Creating OpenRouter HTTP client (http2={http2}, limits={limits})")
+        return httpx.AsyncClient(timeout=settings.OPENROUTER_TIMEOUT, limits=limits, http2=http2)
+
+    async def start(self):
+        """Buat HTTP client bersama (dipanggil dari lifespan aplikasi)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+
+    async def aclose(self):
+        """Tutup HTTP client bersama beserta koneksi di pool-nya"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Client bersama; dibuat lazy jika service dipakai di luar lifespan (mis. skrip)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
     def build_profile_context(self, profile: Dict) -> str:
         """Build context string dari hasil survey profil user (WHO-5, GAD-7, MBI, NAQ-R, K10)"""
         # The new profile structure has 'biodata' and 'health_results'
@@ -74,64 +168,330 @@ class OpenRouterService:
 
         return "\n".join(context_parts)
 
+    def profile_risk_bucket(self, profile: Optional[Dict]) -> str:
+        """
+        Bucket risiko kasar dari kategori yang sama dengan build_profile_context:
+        tingkat terberat di antara WHO-5, GAD-7, MBI, dan K10
+        """
+        if not profile or not profile.get("health_results"):
+            return "tanpa-profil"
+
+        from core.services.profiling_service import profiling_service
+
+        latest_result = profile["health_results"][0]
+        # Posisi kategori di tabel kategori masing-masing = tingkat keparahan (0..3)
+        _, category_who5 = profiling_service.get_who5_result([latest_result['who5_total']])
+        _, category_gad7 = profiling_service.get_gad7_result([latest_result['gad7_total']])
+        _, category_k10 = profiling_service.get_k10_result([latest_result['k10_total']])
+        who5_levels = [category for _, category in profiling_service.who5_category]
+        levels = [
+            len(who5_levels) - 1 - who5_levels.index(category_who5),  # WHO-5: skor rendah = berat
+            [category for _, category in profiling_service.gad7_category].index(category_gad7),
+            [category for _, category in profiling_service.k10_category].index(category_k10),
+        ]
+
+        # MBI: kelelahan emosional / sinis tinggi atau pencapaian rendah = burnout sedang-tinggi
+        mbi_levels = {"Rendah": 0, "Sedang": 1, "Tinggi": 2}
+        levels.append(mbi_levels[profiling_service.get_mbi_category('emosional', latest_result['mbi_emosional_total'])])
+        levels.append(mbi_levels[profiling_service.get_mbi_category('sinis', latest_result['mbi_sinis_total'])])
+        levels.append(2 - mbi_levels[profiling_service.get_mbi_category('pencapaian', latest_result['mbi_pencapaian_total'])])
+        return RISK_BUCKETS[min(max(levels), len(RISK_BUCKETS) - 1)]
+
+    def build_profile_bucket_context(self, profile: Dict) -> str:
+        """
+        Versi build_profile_context tanpa skor: hanya label kategori tiap kuesioner dan
+        bucket risiko. User dengan kategori yang sama mendapat teks yang persis sama,
+        sehingga jawaban yang dibuat darinya aman dipakai ulang lewat cache jawaban.
+        """
+        if not profile or not profile.get("health_results"):
+            return ""
+
+        from core.services.profiling_service import profiling_service
+
+        latest_result = profile["health_results"][0]
+        _, category_who5 = profiling_service.get_who5_result([latest_result['who5_total']])
+        _, category_gad7 = profiling_service.get_gad7_result([latest_result['gad7_total']])
+        _, category_k10 = profiling_service.get_k10_result([latest_result['k10_total']])
+        naqr_total = latest_result['naqr_pribadi_total'] + latest_result['naqr_pekerjaan_total'] + latest_result['naqr_intimidasi_total']
+        return "\n".join([
+            f"Tingkat risiko keseluruhan: {self.profile_risk_bucket(profile)}",
+            f"WHO-5 Well-Being Index: Kategori: {category_who5}",
+            f"GAD-7 (Kecemasan): Kategori: {category_gad7}",
+            f"MBI (Burnout): Kelelahan Emosional {profiling_service.get_mbi_category('emosional', latest_result['mbi_emosional_total'])}, "
+            f"Sinis {profiling_service.get_mbi_category('sinis', latest_result['mbi_sinis_total'])}, "
+            f"Pencapaian Pribadi {profiling_service.get_mbi_category('pencapaian', latest_result['mbi_pencapaian_total'])}",
+            f"NAQ-R (Perundungan): Kategori: {profiling_service.get_naqr_category_from_total(naqr_total)}",
+            f"K10 (Distres Psikososial): Kategori: {category_k10}",
+        ])
+
+    @staticmethod
+    def answer_fingerprint() -> str:
+        """
+        Jawaban cache tidak berlaku lagi jika versi index atau system prompt berubah.
+        Memakai versi yang sudah dimuat (tanpa cek pointer file) karena dipanggil di event loop;
+        versi baru dari proses lain terbaca saat retrieval berikutnya di executor.
+        """
+        return hashlib.sha1(f"{rag_service.index_version}\x00{SYSTEM_PROMPT}".encode("utf-8")).hexdigest()
+
+    async def _question_embedding(self, question: str):
+        """Embedding pertanyaan untuk cache jawaban dan gate topik; None jika tidak tersedia"""
+        # Jangan menunggu load model saat warm-up hanya demi cache / gate
+        if (self.answer_cache is None and rag_service.topic_classifier is None) or not rag_service.is_ready:
+            return None
+        try:
+            return await rag_service.aembed_query(question)
+        except Exception as e:
+            logger.warning(f"Question embedding failed, skipping answer cache and topic classifier: {e}")
+            return None
+
+    def _remember_answer(self, cache_key, answer: str) -> str:
+        if cache_key is not None and answer and not answer.startswith("Maaf"):
+            self.answer_cache.set(*cache_key, answer)
+        return answer
+
+    async def _prepare_question(self, question: str, profile: Optional[Dict]) -> PreparedQuestion:
+        """
+        Langkah sebelum LLM: cache jawaban, gate topik, RAG, dan profil. Jika `answer`
+        terisi (cache hit / pertanyaan ditolak), LLM tidak perlu dipanggil.
+        """
+        question_embedding = await self._question_embedding(question)
+        cache_key = None
+        if self.answer_cache is not None and question_embedding is not None:
+            # Jawaban yang bisa di-cache dibuat dari profil tingkat bucket (label kategori tanpa
+            # skor), dan teks itu sendiri menjadi bucket cache: jawaban hanya dipakai ulang
+            # untuk user yang profilnya menghasilkan teks yang sama persis
+            profile_context = self.build_profile_bucket_context(profile) if profile else ""
+            cache_key = (question_embedding, profile_context or "tanpa-profil", self.answer_fingerprint())
+            cached_answer = self.answer_cache.get(*cache_key)
+            if cached_answer:
+                logger.info(f"Semantic answer cache hit (risk bucket: {self.profile_risk_bucket(profile)})")
+                return PreparedQuestion(answer=cached_answer)
+        else:
+            profile_context = self.build_profile_context(profile) if profile else ""
+
+        # Gate topik: keyword dulu (regex), lalu classifier embedding sebelum RAG dan LLM
+        keyword_match = TextUtils.is_psikologi_related(question)
+        if not keyword_match and rag_service.topic_classifier and question_embedding is not None:
+            if rag_service.topic_classifier.is_on_topic(question_embedding) is False:
+                logger.info("Question rejected by topic classifier")
+                return PreparedQuestion(answer=OFF_TOPIC_ANSWER)
+
+        # Get RAG context
+        kitab_context = ""
+        try:
+            context_result = await rag_service.aget_context(question, top_k=5)
+            kitab_context = context_result.text
+            logger.info(f"RAG context: {context_result.tokens} tokens, passages: {context_result.passage_ids}")
+        except Exception as e:
+            logger.warning(f"RAG failed: {e}")
+            if kitab_loader.paragraphs:
+                kitab_context = " ".join(kitab_loader.paragraphs[:5])
+
+        # If question not Psiko and no context found -> reject politely
+        if not keyword_match and (not kitab_context or kitab_context.strip().lower().startswith("data kitab")):
+            return PreparedQuestion(answer=OFF_TOPIC_ANSWER)
+
+        return PreparedQuestion(cache_key=cache_key, kitab_context=kitab_context, profile_context=profile_context)
+
     async def get_Psiko_answer(self, question: str, profile: Optional[Dict] = None) -> Optional[str]:
         try:
             logger.info(f"Processing question: {question}")
+            prepared = await self._prepare_question(question, profile)
+            if prepared.answer:
+                return prepared.answer
 
-            # Get RAG context
-            kitab_context = ""
-            try:
-                kitab_context = rag_service.get_context_for_question(question, top_k=5, max_chars=1500)
-                logger.info(f"RAG context length: {len(kitab_context)}")
-            except Exception as e:
-                logger.warning(f"RAG failed: {e}")
-                if kitab_loader.paragraphs:
-                    kitab_context = " ".join(kitab_loader.paragraphs[:5])
+            # Try default model then fallbacks (berurutan, atau hedged paralel bila diaktifkan)
+            models = self._model_order()
+            if settings.LLM_HEDGING_ENABLED:
+                answer = await self._hedged_answer(question, prepared.kitab_context, prepared.profile_context, models)
+            else:
+                answer = await self._sequential_answer(question, prepared.kitab_context, prepared.profile_context, models)
+            if answer:
+                return self._remember_answer(prepared.cache_key, answer)
 
-            # Build profile context
-            profile_context = self.build_profile_context(profile) if profile else ""
+            return UNAVAILABLE_ANSWER
 
-            # If question not Psiko and no context found -> reject politely
-            if not TextUtils.is_psikologi_related(question) and (not kitab_context or kitab_context.strip().lower().startswith("data kitab")):
-                return "Maaf, saya hanya bisa menjawab pertanyaan seputar Psikologi atau konten yang ada di kitab yang tersedia."
+        except Exception as e:
+            logger.exception(f"Error in get_Psiko_answer: {e}")
+            return ERROR_ANSWER
 
-            # Try default model then fallbacks
-            try:
-                answer = await self._make_api_request(question, kitab_context, profile_context, self.default_model)
-                logger.info(f"Default model answer length: {len(answer) if answer else 0}")
-                if answer and not answer.startswith("Maaf"):
-                    return answer
-            except Exception as e:
-                logger.warning(f"Default model failed: {e}")
+    async def stream_Psiko_answer(self, question: str, profile: Optional[Dict] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Versi streaming get_Psiko_answer: menghasilkan ("token", potongan teks) selama model
+        menjawab, lalu tepat satu ("done", jawaban final yang sudah di-format_response).
+        Fallback ke model berikutnya hanya mungkin sebelum token pertama terkirim.
+        """
+        try:
+            logger.info(f"Processing streamed question: {question}")
+            prepared = await self._prepare_question(question, profile)
+            if prepared.answer:
+                yield "done", prepared.answer
+                return
 
-            for model in self.available_models:
-                if model == self.default_model:
+            for model in self._model_order():
+                if not self.model_health.acquire(model):
                     continue
+                started = time.monotonic()
+                tokens: List[str] = []
+                failed = False
+                recorded = False
                 try:
-                    answer = await self._make_api_request(question, kitab_context, profile_context, model)
-                    if answer and not answer.startswith("Maaf"):
-                        return answer
-                except Exception as e:
-                    logger.warning(f"Fallback {model} failed: {e}")
-                    continue
+                    try:
+                        async for token in self._stream_api_request(
+                            question, prepared.kitab_context, prepared.profile_context, model
+                        ):
+                            tokens.append(token)
+                            yield "token", token
+                    except (RateLimitTimeout, RateLimited) as e:
+                        # Antrean penuh / 429 bukan kesalahan model; model lain kena batas akun yang sama
+                        logger.warning(f"Streaming from {model} not sent: {e}")
+                        break
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        failed = True
+                        logger.warning(f"Streaming from {model} failed after {len(tokens)} tokens: {e}")
+
+                    raw_answer = "".join(tokens)
+                    if not failed and self._is_good_answer(raw_answer.strip()):
+                        self.model_health.record_success(model, time.monotonic() - started)
+                        recorded = True
+                        answer = TextUtils.format_response(raw_answer)
+                        yield "done", self._remember_answer(prepared.cache_key, answer)
+                        return
+                    self.model_health.record_failure(model, time.monotonic() - started)
+                    recorded = True
+                    if tokens:
+                        # Sebagian jawaban sudah terkirim ke user; jangan sambung dengan model lain
+                        # dan jangan simpan ke cache (jawaban bisa terpotong)
+                        yield "done", TextUtils.format_response(raw_answer) if raw_answer.strip() else UNAVAILABLE_ANSWER
+                        return
+                finally:
+                    # Dibatalkan, generator ditutup (client putus saat yield) atau antrean penuh:
+                    # lepas slot percobaan half-open agar breaker tidak tertahan
+                    if not recorded:
+                        self.model_health.release(model)
 
-            return "Maaf, saat ini tidak dapat terhubung ke AI service. Silakan coba lagi nanti."
+            yield "done", UNAVAILABLE_ANSWER
 
         except Exception as e:
-            logger.exception(f"Error in get_Psiko_answer: {e}")
-            return "Maaf, terjadi kesalahan sistem. Silakan coba lagi."
+            logger.exception(f"Error in stream_Psiko_answer: {e}")
+            yield "done", ERROR_ANSWER
 
-    async def _make_api_request(self, question: str, kitab_context: str, profile_context: str, model: str, retries: int = 3) -> str:
-        system_prompt = """
-Kamu adalah Chatbot Psikologi dan Kesehatan yang membantu user memahami isu-isu psikologi, kesehatan mental, dan kesejahteraan.
+    def _model_order(self) -> List[str]:
+        """Model default lalu fallback, diurutkan ulang menurut kesehatan; breaker terbuka dilewati"""
+        preferred = [self.default_model] + [model for model in self.available_models if model != self.default_model]
+        models = self.model_health.order(preferred)
+        if len(models) < len(preferred):
+            logger.info(f"Skipping models with open circuit breaker: {[m for m in preferred if m not in models]}")
+        return models
 
-Aturan menjawab:
-1. Jika pertanyaan sesuai dengan konteks psikologi atau kesehatan, jawab berdasarkan data yang sudah dimuat dari kitab.pdf.
-2. Jika pertanyaan tidak murni psikologi/kesehatan, tapi ada jawaban relevan di kitab.pdf, tetap jawab dengan jelas.
-3. Jika pertanyaan benar-benar di luar konteks data, jawab dengan sopan bahwa bot ini hanya fokus pada psikologi dan kesehatan sesuai data yang tersedia.
-4. Sertakan sumber jika jawaban diambil dari kitab.pdf.
-5. PENTING: Sesuaikan gaya bahasa dan kedalaman penjelasan dengan profil user yang diberikan (hasil survey WHO-5, GAD-7, MBI, NAQ-R, K10).
-"""
+    @staticmethod
+    def _is_good_answer(answer: Optional[str]) -> bool:
+        return bool(answer) and not answer.startswith("Maaf")
+
+    def _hedge_delay(self, model: str) -> float:
+        """
+        Waktu tunggu sebelum model berikutnya ikut dijalankan: kuantil LLM_HEDGE_QUANTILE
+        dari latensi jawaban sukses model ini, atau LLM_HEDGE_DEFAULT_DELAY jika sampel kurang.
+        """
+        delay = self.model_health.latency_quantile(
+            model, settings.LLM_HEDGE_QUANTILE, min_samples=settings.LLM_HEDGE_MIN_SAMPLES
+        )
+        if delay is None:
+            return settings.LLM_HEDGE_DEFAULT_DELAY
+        return max(settings.LLM_HEDGE_MIN_DELAY, delay)
+
+    async def _timed_request(self, question: str, kitab_context: str, profile_context: str, model: str) -> str:
+        """_make_api_request dengan izin circuit breaker; hasil dan latensinya dicatat ke model_health"""
+        if not self.model_health.acquire(model):
+            logger.info(f"Circuit breaker for {model} is open, skipping")
+            return ""
+        started = time.monotonic()
+        try:
+            answer = await self._make_api_request(question, kitab_context, profile_context, model)
+        except (asyncio.CancelledError, RateLimitTimeout, RateLimited):
+            # Dibatalkan (kalah hedging), tertahan rate limiter, atau 429 bukan berarti model bermasalah
+            self.model_health.release(model)
+            raise
+        except Exception:
+            self.model_health.record_failure(model, time.monotonic() - started)
+            raise
+        if self._is_good_answer(answer):
+            self.model_health.record_success(model, time.monotonic() - started)
+        else:
+            self.model_health.record_failure(model, time.monotonic() - started)
+        return answer
+
+    async def _sequential_answer(self, question: str, kitab_context: str, profile_context: str, models: List[str]) -> str:
+        for model in models:
+            try:
+                answer = await self._timed_request(question, kitab_context, profile_context, model)
+                logger.info(f"Model {model} answer length: {len(answer) if answer else 0}")
+                if self._is_good_answer(answer):
+                    return answer
+            except (RateLimitTimeout, RateLimited) as e:
+                logger.warning(f"Model {model} not sent: {e}")
+                return ""
+            except Exception as e:
+                logger.warning(f"Model {model} failed: {e}")
+        return ""
+
+    async def _hedged_answer(self, question: str, kitab_context: str, profile_context: str, models: List[str]) -> str:
+        """
+        Hedged requests: model pertama dijalankan; jika belum menjawab setelah delay
+        kuantil latensinya (atau gagal), model berikutnya ikut dijalankan paralel
+        (maksimal LLM_HEDGE_MAX_IN_FLIGHT sekaligus). Jawaban baik pertama dipakai,
+        request lain dibatalkan.
+        """
+        queue = list(models)
+        pending: Dict[asyncio.Task, str] = {}
+        deadline = None
+
+        def launch():
+            nonlocal deadline
+            model = queue.pop(0)
+            task = asyncio.create_task(self._timed_request(question, kitab_context, profile_context, model))
+            pending[task] = model
+            deadline = time.monotonic() + self._hedge_delay(model)
+            if len(pending) > 1:
+                logger.info(f"Hedging: launched {model} alongside {[m for m in pending.values() if m != model]}")
+
+        try:
+            launch()
+            while pending:
+                can_hedge = bool(queue) and len(pending) < settings.LLM_HEDGE_MAX_IN_FLIGHT
+                timeout = max(0.0, deadline - time.monotonic()) if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+
+                for task in done:
+                    model = pending.pop(task)
+                    try:
+                        answer = task.result()
+                    except (RateLimitTimeout, RateLimited) as e:
+                        # Batas akun: model lain juga akan ditolak, tunggu request yang masih berjalan saja
+                        logger.warning(f"Model {model} not sent: {e}")
+                        queue.clear()
+                        answer = ""
+                    except Exception as e:
+                        logger.warning(f"Model {model} failed: {e}")
+                        answer = ""
+                    if self._is_good_answer(answer):
+                        logger.info(f"Hedged answer from {model} (length: {len(answer)})")
+                        return answer
+                # Model gagal: langsung jalankan model berikutnya tanpa menunggu delay
+                if queue and len(pending) < settings.LLM_HEDGE_MAX_IN_FLIGHT:
+                    launch()
+            return ""
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _build_payload(self, question: str, kitab_context: str, profile_context: str, model: str) -> dict:
+        system_prompt = SYSTEM_PROMPT
 
         # Tambahkan profile context ke system prompt
         if profile_context:
@@ -156,40 +516,86 @@ Konteks relevan (diambil dari kitab):
             "temperature": 0.2,
             "top_p": 0.9,
         }
+        return payload
 
-        headers = {
+    def _headers(self) -> dict:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "https://github.com/Psiko-bot",
             "X-Title": "Chatbot Psiko Indonesia"
         }
 
+    async def _stream_api_request(self, question: str, kitab_context: str, profile_context: str,
+                                  model: str) -> AsyncIterator[str]:
+        """Request OpenRouter dengan `stream: true`; menghasilkan potongan konten jawaban (SSE)"""
+        payload = self._build_payload(question, kitab_context, profile_context, model)
+        payload["stream"] = True
+        client = self.get_client()
+        # Slot limiter dipegang selama stream berjalan (ikut dihitung batas request bersamaan)
+        async with self.rate_limiter.slot():
+            logger.info(f"Streaming request to OpenRouter model={model}")
+            async with client.stream("POST", self.api_url, json=payload, headers=self._headers()) as response:
+                self.rate_limiter.observe(response)
+                if response.status_code == 429:
+                    raise RateLimited(f"OpenRouter rate limited model={model}")
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise RuntimeError(f"OpenRouter error {response.status_code}: {body[:500]!r}")
+                async for line in response.aiter_lines():
+                    # Baris komentar (": OPENROUTER PROCESSING") dan baris kosong diabaikan
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+                    choices = chunk.get("choices") or []
+                    content = (choices[0].get("delta") or {}).get("content") if choices else None
+                    if content:
+                        yield content
+
+    async def _make_api_request(self, question: str, kitab_context: str, profile_context: str, model: str, retries: int = 3) -> str:
+        """
+        Request non-streaming lewat rate limiter global. Pada 429 limiter menjeda semua
+        pengirim sesuai Retry-After / X-RateLimit-Reset, lalu percobaan berikutnya ikut antre.
+        RateLimitTimeout (antrean penuh) dan RateLimited (masih 429 setelah semua percobaan)
+        diteruskan ke pemanggil karena bukan kegagalan model.
+        """
+        payload = self._build_payload(question, kitab_context, profile_context, model)
+        headers = self._headers()
+
         for attempt in range(1, retries + 1):
             try:
-                async with httpx.AsyncClient(timeout=45.0) as client:
+                client = self.get_client()
+                async with self.rate_limiter.slot():
                     logger.info(f"Sending request to OpenRouter model={model} attempt={attempt}")
                     response = await client.post(self.api_url, json=payload, headers=headers)
-                    if response.status_code == 200:
-                        data = response.json()
-                        raw_answer = data["choices"][0]["message"]["content"]
-                        formatted = TextUtils.format_response(raw_answer)
-                        return formatted if formatted else raw_answer
-                    elif response.status_code == 429:
-                        logger.warning(f"Rate limited (429) on attempt {attempt}")
-                        if attempt < retries:
-                            await asyncio.sleep(2 * attempt)
-                            continue
-                        else:
-                            return ""
-                    else:
-                        logger.error(f"OpenRouter error {response.status_code}: {response.text}")
-                        return ""
+                self.rate_limiter.observe(response)
+                if response.status_code == 200:
+                    data = response.json()
+                    raw_answer = data["choices"][0]["message"]["content"]
+                    formatted = TextUtils.format_response(raw_answer)
+                    return formatted if formatted else raw_answer
+                elif response.status_code == 429:
+                    logger.warning(f"Rate limited (429) on attempt {attempt}")
+                    if attempt < retries:
+                        # Tidak perlu sleep di sini: slot berikutnya menunggu jeda global limiter
+                        continue
+                    raise RateLimited(f"OpenRouter rate limited model={model} after {retries} attempts")
+                else:
+                    logger.error(f"OpenRouter error {response.status_code}: {response.text}")
+                    return ""
             except httpx.TimeoutException:
                 logger.warning("Timeout, retrying...")
                 if attempt < retries:
                     await asyncio.sleep(2 * attempt)
                     continue
                 return ""
+            except (RateLimitTimeout, RateLimited):
+                raise
             except Exception as e:
                 logger.exception(f"Request error: {e}")
                 return ""
@@ -0,0 +1,92 @@
+# src/services/rag_benchmark.py
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from core.services.vector_store import SearchHit
+
+
+@dataclass
+class LabelledQuestion:
+    """
+    Satu pertanyaan benchmark. Setiap target relevan berupa id chunk, nama sumber
+    ("burnout.pdf"), atau sumber + halaman ("burnout.pdf#12").
+    """
+    question: str
+    relevant: List[str] = field(default_factory=list)
+
+
+def load_questions(path: str) -> List[LabelledQuestion]:
+    """Baca file JSONL: {"question": "...", "relevant": ["burnout.pdf#12", ...]} per baris"""
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            item = json.loads(line)
+            relevant = item.get("relevant") or []
+            if isinstance(relevant, str):
+                relevant = [relevant]
+            if not item.get("question") or not relevant:
+                raise ValueError(f"{path}:{line_number}: 'question' and 'relevant' are required")
+            questions.append(LabelledQuestion(question=item["question"], relevant=[str(r) for r in relevant]))
+    return questions
+
+
+def matches(hit: SearchHit, target: str) -> bool:
+    if hit.id == target:
+        return True
+    source, _, page = target.partition("#")
+    if hit.metadata.get("source") != source:
+        return False
+    if not page:
+        return True
+    page_start = hit.metadata.get("page_start")
+    page_end = hit.metadata.get("page_end") or page_start
+    return page_start is not None and int(page_start) <= int(page) <= int(page_end)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Persentil nearest-rank (q dalam 0..100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_benchmark(rag_service, questions: List[LabelledQuestion], k: int = 5) -> dict:
+    """
+    Jalankan retrieval untuk setiap pertanyaan dan hitung recall@k (rata-rata porsi target
+    relevan yang muncul di top-k), MRR (1 / peringkat hit relevan pertama), dan latensi
+    query p50/p95. Cache embedding query dikosongkan dulu agar latensi mencerminkan encode.
+    """
+    rag_service.embedding_fn.query_cache.clear()
+    recalls, reciprocal_ranks, latencies = [], [], []
+    misses = []
+    for item in questions:
+        started = time.perf_counter()
+        hits = rag_service.retrieve(item.question, top_k=k)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+
+        found = [target for target in item.relevant if any(matches(hit, target) for hit in hits)]
+        recalls.append(len(found) / len(item.relevant))
+        rank = next((i for i, hit in enumerate(hits, start=1) if any(matches(hit, t) for t in item.relevant)), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        if rank is None:
+            misses.append(item.question)
+
+    count = len(questions)
+    return {
+        "questions": count,
+        "k": k,
+        "index_version": rag_service.index_version,
+        f"recall@{k}": round(sum(recalls) / count, 4) if count else 0.0,
+        "mrr": round(sum(reciprocal_ranks) / count, 4) if count else 0.0,
+        "latency_ms_p50": round(percentile(latencies, 50), 2),
+        "latency_ms_p95": round(percentile(latencies, 95), 2),
+        "misses": misses,
+    }
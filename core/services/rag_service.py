@@ -1,69 +1,694 @@
 # src/services/rag_service.py
 import os
-import chromadb
-from common.data.kitab_loader import kitab_loader
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from common.config.settings import settings
+from common.data.kitab_loader import kitab_loader, SUPPORTED_EXTENSIONS
+from common.utils.chunker import SentenceChunker
+from common.utils.lru_cache import LRUCache
+from common.utils.text_utils import TextUtils
+from core.services.chunk_dedup import ChunkDeduplicator
+from core.services.context_packer import ContextPacker, ContextResult
+from core.services.lexical_index import BM25Index, reciprocal_rank_fusion
 from core.services.openrouter_embedding import HuggingFaceEmbeddingFunction
+from core.services.reranker import CrossEncoderReranker
+from core.services.topic_classifier import TopicClassifier
+from core.services.vector_store import (
+    ChromaBackend, NumpyBackend, SearchHit, active_version_mtime, read_active_version, write_active_version
+)
 
+logger = logging.getLogger(__name__)
 
 CHROMA_PATH = os.path.join(os.path.dirname(__file__), "../data/chromadb")
+NUMPY_INDEX_PATH = os.path.join(os.path.dirname(__file__), "../data/npindex")
+COLLECTION_NAME = "kitab_psikolog"
+# Manifest korpus di root backend: source -> mtime, size, chunk ids
+MANIFEST_FILENAME = "corpus_manifest.json"
+# Laporan chunk duplikat yang di-drop pada build terakhir
+DEDUP_REPORT_FILENAME = "dedup_report.json"
+# Jumlah chunk per panggilan embed + add ke Chroma saat indexing
+INDEX_BATCH_SIZE = 256
+
+
+@dataclass
+class IndexBuildReport:
+    """Ringkasan satu kali build index"""
+    version: Optional[str] = None
+    sources_indexed: List[str] = field(default_factory=list)
+    sources_skipped: List[str] = field(default_factory=list)
+    sources_removed: List[str] = field(default_factory=list)
+    # Sumber yang gagal dibaca (PDF/DOCX rusak); chunk lamanya tetap di index
+    sources_failed: List[str] = field(default_factory=list)
+    chunks_total: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    duplicates: List[dict] = field(default_factory=list)
+    # Statistik throughput ingestion
+    pages_read: int = 0
+    chunks_loaded: int = 0
+    load_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    def throughput(self) -> dict:
+        """Halaman/chunk per detik saat load + chunking, embedding per detik saat embed"""
+        def rate(count, seconds):
+            return round(count / seconds, 2) if seconds > 0 else None
+
+        return {
+            "pages_per_s": rate(self.pages_read, self.load_seconds),
+            "chunks_per_s": rate(self.chunks_loaded, self.load_seconds),
+            "embeddings_per_s": rate(self.chunks_added, self.embed_seconds),
+        }
+
+    def kept_ids(self, chunks: Dict[str, Tuple[str, dict]]) -> List[str]:
+        """Id chunk sumber yang benar-benar masuk index (tanpa yang di-drop sebagai duplikat)"""
+        dropped = {duplicate["id"] for duplicate in self.duplicates}
+        return [chunk_id for chunk_id in chunks if chunk_id not in dropped]
+
+    def duplicates_of(self, chunks: Dict[str, Tuple[str, dict]]) -> Dict[str, str]:
+        """Chunk sumber yang di-drop -> id chunk (bisa dari sumber lain) yang menggantikannya"""
+        return {
+            duplicate["id"]: duplicate["duplicate_of"]
+            for duplicate in self.duplicates if duplicate["id"] in chunks
+        }
 
 class RagService:
     def __init__(self):
-        self.client = chromadb.PersistentClient(path=CHROMA_PATH)
-        self.collection = None
+        self.index = None
+        self.lexical_index = None
+        self.index_version = None
+        # Versi aktif sebelum swap terakhir di proses ini (dipertahankan oleh GC dari CLI)
+        self.previous_index_version = None
+        # mtime pointer versi aktif saat terakhir dibaca; berubah = proses lain mem-publish versi baru
+        self._active_mtime = None
+        self._swap_lock = threading.RLock()
+        self._build_lock = threading.Lock()
         # Pakai custom embedding function via OpenRouter
         self.embedding_fn = HuggingFaceEmbeddingFunction()
+        self._backend = None
+        self.reranker = CrossEncoderReranker(
+            settings.RAG_RERANK_MODEL,
+            batch_size=settings.RAG_RERANK_BATCH_SIZE
+        ) if settings.RAG_RERANK_ENABLED else None
+        # Gate topik berbasis embedding (centroid on/off-topic), opsional
+        self.topic_classifier = TopicClassifier(
+            self.embedding_fn,
+            min_similarity=settings.TOPIC_CLASSIFIER_MIN_SIMILARITY,
+            margin=settings.TOPIC_CLASSIFIER_MARGIN
+        ) if settings.TOPIC_CLASSIFIER_ENABLED else None
+        # Status kesiapan retrieval: "starting" -> "warming" -> "ready" / "failed"
+        self.readiness = "starting"
+        self.readiness_error = None
+        # Executor khusus untuk retrieval agar encode + query vector store tidak memblokir event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.RAG_EXECUTOR_WORKERS,
+            thread_name_prefix="rag-retrieval"
+        )
+        # Cache hasil retrieval final; kunci menyertakan versi index
+        self.context_cache = LRUCache(
+            maxsize=settings.RAG_CONTEXT_CACHE_SIZE,
+            ttl=settings.RAG_CONTEXT_CACHE_TTL
+        )
+        self.context_packer = ContextPacker(
+            token_budget=settings.RAG_CONTEXT_TOKEN_BUDGET,
+            mmr_lambda=settings.RAG_MMR_LAMBDA,
+            tokenizer_name=settings.RAG_CONTEXT_TOKENIZER
+        )
+        self.chunker = SentenceChunker(
+            max_size=settings.RAG_CHUNK_SIZE,
+            overlap=settings.RAG_CHUNK_OVERLAP,
+            unit=settings.RAG_CHUNK_UNIT
+        )
+        # Build index di background tidak boleh memakan slot executor retrieval
+        self._build_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-build")
+
+    @property
+    def backend(self):
+        """Vector store dibuka saat pertama kali dibutuhkan, bukan saat modul di-import"""
+        if self._backend is None:
+            with self._swap_lock:
+                if self._backend is None:
+                    self._backend = self._create_backend()
+        return self._backend
+
+    @property
+    def is_ready(self) -> bool:
+        return self.readiness == "ready"
+
+    def warm_up(self):
+        """Muat model embedding dan index aktif (+ BM25) lalu tandai retrieval siap"""
+        self.readiness = "warming"
+        try:
+            self.embedding_fn.warm_up()
+            if self.reranker:
+                self.reranker.warm_up()
+            if self.topic_classifier:
+                self.topic_classifier.warm_up()
+            index = self._get_active_index()
+            logger.info(f"RAG warm-up finished (index version: {self.index_version}, "
+                        f"chunks: {index.count() if index is not None else 0})")
+        except Exception as e:
+            logger.exception(f"RAG warm-up failed: {e}")
+            self.readiness, self.readiness_error = "failed", str(e)
+            return
+        self.readiness, self.readiness_error = "ready", None
+
+    async def warm_up_async(self):
+        """Warm-up di executor retrieval; dipanggil sebagai background task dari lifespan"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.warm_up)
+
+    def readiness_report(self) -> dict:
+        return {
+            "status": self.readiness,
+            "model_loaded": self.embedding_fn.is_loaded,
+            "index_version": self.index_version,
+            "error": self.readiness_error,
+        }
+
+    def _create_backend(self):
+        """Vector store sesuai RAG_VECTOR_BACKEND: "chroma" (default) atau "numpy" (flat index mmap)"""
+        if settings.RAG_VECTOR_BACKEND == "numpy":
+            return NumpyBackend(settings.RAG_NUMPY_INDEX_PATH or NUMPY_INDEX_PATH, dtype=settings.RAG_NUMPY_DTYPE)
+        if settings.RAG_VECTOR_BACKEND != "chroma":
+            raise ValueError(f"Unknown RAG_VECTOR_BACKEND: {settings.RAG_VECTOR_BACKEND}")
+        return ChromaBackend(CHROMA_PATH, COLLECTION_NAME, self.embedding_fn)
 
     def build_index(self, file_path: str):
-        """Load kitab.pdf lalu simpan ke ChromaDB"""
-        paragraphs = kitab_loader.load_pdf(file_path)
-        if not paragraphs:
+        """
+        Load kitab.pdf lalu bangun versi index baru di vector store (blue/green).
+        Chunk diberi id berdasarkan hash isi + sumber; chunk yang tidak berubah disalin
+        beserta embedding-nya dari versi aktif, hanya chunk baru yang di-embed.
+        Versi baru divalidasi dengan smoke query sebelum dipakai untuk retrieval,
+        sehingga retrieval tidak pernah melihat index kosong atau setengah jadi.
+        """
+        source = os.path.basename(file_path)
+        chunks = self._load_chunks(file_path, source)
+        if not chunks:
             return 0
 
-        # kalau collection sudah ada, hapus total
+        with self._build_lock:
+            manifest = self._read_manifest()
+            report = self._publish({source: chunks}, removed_sources=set())
+            manifest[source] = self._manifest_entry(file_path, report.kept_ids(chunks), report.duplicates_of(chunks))
+            self._write_manifest(manifest, report.version)
+        return len(chunks)
+
+    def build_corpus(self, corpus_dir: str, full: bool = False) -> IndexBuildReport:
+        """
+        Ingest seluruh dokumen PDF/DOCX/TXT di sebuah direktori ke satu index.
+        Manifest (source, mtime, size, chunk ids) dipakai untuk melewati file yang tidak
+        berubah; file yang dihapus dari direktori ikut dihapus dari index. File yang gagal
+        dibaca dilewati (isi lamanya di index dipertahankan) tanpa menggagalkan build.
+        full=True: abaikan manifest dan embed ulang semua chunk (rebuild penuh).
+        """
+        if not os.path.isdir(corpus_dir):
+            # Direktori salah ketik jangan sampai dianggap "semua sumber dihapus"
+            raise FileNotFoundError(f"Corpus directory not found: {corpus_dir}")
+        started = time.perf_counter()
+        stats = IndexBuildReport()
+        files = {}
+        for root, _, names in os.walk(corpus_dir):
+            for name in sorted(names):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    files[os.path.relpath(path, corpus_dir).replace(os.sep, "/")] = path
+
+        with self._build_lock:
+            manifest = self._read_manifest()
+            active = self._get_active_index()
+            ids, metadatas = active.ids_and_metadatas() if active else ([], [])
+            active_ids = set(ids)
+            active_sources = {metadata.get("source") for metadata in metadatas} - {None}
+
+            removed_sources = (active_sources | set(manifest)) - set(files)
+            changed, skipped, touched, failed = {}, [], [], []
+
+            def load(source, reuse_unchanged=True):
+                load_started = time.perf_counter()
+                try:
+                    chunks = self._load_chunks(files[source], source, stats)
+                except Exception as e:
+                    # Satu file rusak / tidak terbaca jangan menggagalkan seluruh build: sumber ini
+                    # diperlakukan seperti tidak berubah (chunk dan entri manifest lama dipertahankan)
+                    logger.error(f"Failed to load {source}, keeping its indexed chunks: {e}")
+                    failed.append(source)
+                    return
+                finally:
+                    stats.load_seconds += time.perf_counter() - load_started
+                stats.chunks_loaded += len(chunks)
+                entry = manifest.get(source)
+                if (reuse_unchanged and not full and entry and self._entry_indexed(entry, active_ids)
+                        and set(chunks) == set(entry["chunk_ids"]) | set(entry.get("duplicates", {}))):
+                    # Hanya mtime yang berubah (touch, git checkout, docker COPY): isi sama,
+                    # cukup perbarui mtime/size di manifest tanpa mem-publish versi baru
+                    stat = os.stat(files[source])
+                    manifest[source] = {**entry, "mtime": stat.st_mtime, "size": stat.st_size}
+                    touched.append(source)
+                    skipped.append(source)
+                    return
+                if chunks:
+                    changed[source] = chunks
+
+            for source, path in files.items():
+                entry = manifest.get(source)
+                stat = os.stat(path)
+                if (not full and entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size
+                        and self._entry_indexed(entry, active_ids)):
+                    skipped.append(source)
+                    continue
+                load(source)
+
+            # Sumber yang tidak berubah tetapi chunk duplikatnya menunjuk ke chunk sumber lain yang
+            # diubah / dihapus harus dimuat ulang, kalau tidak isinya hilang dari index
+            while True:
+                live_ids = {
+                    chunk_id for chunk_id, metadata in zip(ids, metadatas)
+                    if metadata.get("source") not in removed_sources and metadata.get("source") not in changed
+                }
+                for chunks in changed.values():
+                    live_ids.update(chunks)
+                orphaned = [
+                    source for source in skipped
+                    if not set(manifest[source].get("duplicates", {}).values()) <= live_ids
+                ]
+                if not orphaned:
+                    break
+                for source in orphaned:
+                    logger.info(f"Reloading {source}: chunks it was deduplicated against are gone")
+                    skipped.remove(source)
+                    load(source, reuse_unchanged=False)
+
+            if not changed and not (removed_sources & active_sources):
+                logger.info(f"Corpus unchanged, keeping index version {self.index_version}")
+                if touched:
+                    logger.info(f"Refreshed manifest mtime for unchanged sources: {touched}")
+                    self._write_manifest(manifest, self.index_version)
+                stats.version, stats.sources_skipped, stats.chunks_total = self.index_version, skipped, len(active_ids)
+                stats.sources_failed = failed
+                stats.total_seconds = time.perf_counter() - started
+                return stats
+
+            report = self._publish(changed, removed_sources=removed_sources, full=full)
+            report.sources_skipped = skipped
+            report.sources_failed = failed
+            report.pages_read, report.chunks_loaded = stats.pages_read, stats.chunks_loaded
+            report.load_seconds = stats.load_seconds
+            for source in removed_sources:
+                manifest.pop(source, None)
+            for source, chunks in changed.items():
+                manifest[source] = self._manifest_entry(
+                    files[source], report.kept_ids(chunks), report.duplicates_of(chunks)
+                )
+            self._write_manifest(manifest, report.version)
+        report.total_seconds = time.perf_counter() - started
+        logger.info(f"Corpus build finished in {report.total_seconds:.1f}s: {report.throughput()}")
+        return report
+
+    def rebuild_in_background(self, file_path: str) -> Future:
+        """Jalankan build_index di thread terpisah; retrieval tetap memakai versi aktif sampai swap."""
+        return self._build_executor.submit(self.build_index, file_path)
+
+    def rebuild_corpus_in_background(self, corpus_dir: str, full: bool = False) -> Future:
+        """Jalankan build_corpus di thread terpisah"""
+        return self._build_executor.submit(self.build_corpus, corpus_dir, full)
+
+    @staticmethod
+    def chunk_id(text: str, source: str) -> str:
+        """Id chunk berbasis isi: hash dari teks yang dinormalisasi + nama sumber"""
+        normalized = TextUtils.clean_text(text).lower()
+        return hashlib.sha1(f"{source}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def _load_chunks(self, file_path: str, source: str,
+                     stats: Optional[IndexBuildReport] = None) -> Dict[str, Tuple[str, dict]]:
+        """Baca dokumen secara streaming lalu chunk; hasil: id -> (teks, metadata)"""
+        # Halaman dibaca streaming, langsung di-chunk tanpa list penuh di memori
+        pages = kitab_loader.iter_document_pages(file_path)
+        if stats is not None:
+            pages = self._count_pages(pages, stats)
+        chunks = {}
+        for chunk in self.chunker.chunk_pages(pages):
+            if chunk.text:
+                chunks.setdefault(self.chunk_id(chunk.text, source), (chunk.text, {"source": source, **chunk.metadata()}))
+        return chunks
+
+    @staticmethod
+    def _count_pages(pages, stats: IndexBuildReport):
+        for page in pages:
+            stats.pages_read += 1
+            yield page
+
+    def _publish(self, changed: Dict[str, Dict[str, Tuple[str, dict]]], removed_sources: Set[str],
+                 full: bool = False) -> IndexBuildReport:
+        """
+        Bangun versi index baru dari versi aktif: sumber di `changed` diganti isinya,
+        sumber di `removed_sources` dibuang, sumber lain disalin apa adanya.
+        full=True: chunk sumber di `changed` selalu di-embed ulang walau sudah ada di versi aktif.
+        Harus dipanggil dengan _build_lock dipegang.
+        """
+        active = self._get_active_index()
+        active_ids, active_metadatas = active.ids_and_metadatas() if active else ([], [])
+        # Versi yang lebih lama dari versi aktif saat ini tidak dipakai siapa pun lagi; versi aktif
+        # (yang akan menjadi versi sebelumnya) dipertahankan untuk proses lain yang belum pindah.
+        # index_version None = collection lama tanpa versi, ikut dipertahankan sampai setelah swap
+        self.backend.drop_stale(self.index_version)
+
+        # Id posisional lama (chunk_0, chunk_1, ...) tidak ikut disalin.
+        keep_ids = []
+        for chunk_id, metadata in zip(active_ids, active_metadatas):
+            source = metadata.get("source")
+            if chunk_id.startswith("chunk_") or source in removed_sources:
+                continue
+            if source not in changed or (chunk_id in changed[source] and not full):
+                keep_ids.append(chunk_id)
+        kept = set(keep_ids)
+
+        new_chunks = {}
+        for chunks in changed.values():
+            for chunk_id, chunk in chunks.items():
+                if chunk_id not in kept:
+                    new_chunks[chunk_id] = chunk
+
+        version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        deduplicator = ChunkDeduplicator(threshold=settings.RAG_DEDUP_THRESHOLD) if settings.RAG_DEDUP_ENABLED else None
+        duplicates = []
+        index = self.backend.create(version)
         try:
-            self.client.delete_collection("kitab_psikolog")
-        except:
-            pass  # kalau belum ada, abaikan
+            # Chunk yang disalin menjadi referensi dedup; chunk baru yang duplikat tidak di-embed
+            self._copy_chunks(active, index, keep_ids, deduplicator)
+            if deduplicator:
+                new_chunks, duplicates = deduplicator.deduplicate(new_chunks)
+            embed_started = time.perf_counter()
+            self._add_chunks(index, new_chunks)
+            embed_seconds = time.perf_counter() - embed_started
+            index = self.backend.finalize(index)
+            self._validate_index(index)
+        except Exception:
+            logger.exception(f"Building index version {version} failed, keeping version {self.index_version}")
+            self.backend.drop(index)
+            raise
 
-        self.collection = self.client.create_collection(
-            name="kitab_psikolog",
-            embedding_function=self.embedding_fn
+        self._activate(version, index)
+
+        report = IndexBuildReport(
+            version=version,
+            sources_indexed=sorted(changed),
+            sources_removed=sorted(removed_sources),
+            chunks_total=len(keep_ids) + len(new_chunks),
+            chunks_added=len(new_chunks),
+            chunks_removed=len(active_ids) - len(keep_ids),
+            duplicates=[duplicate.to_dict() for duplicate in duplicates],
+            embed_seconds=embed_seconds,
+        )
+        if deduplicator:
+            self._write_dedup_report(version, report.duplicates)
+        logger.info(
+            f"Index version {version} published: {report.chunks_added} added, "
+            f"{report.chunks_removed} removed, {len(keep_ids)} unchanged, "
+            f"{len(report.duplicates)} duplicates dropped "
+            f"(sources indexed: {report.sources_indexed}, removed: {report.sources_removed})"
         )
+        return report
 
-        # Chunking sederhana
-        chunks = self.chunk_texts(paragraphs, chunk_size=500)
-        ids = [f"chunk_{i}" for i in range(len(chunks))]
+    def _write_dedup_report(self, version: str, duplicates: List[dict]):
+        exact = sum(1 for duplicate in duplicates if duplicate["reason"] == "exact")
+        path = os.path.join(self.backend.root, DEDUP_REPORT_FILENAME)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": version,
+                "dropped": len(duplicates),
+                "exact": exact,
+                "near": len(duplicates) - exact,
+                "chunks": duplicates,
+            }, f, ensure_ascii=False, indent=2)
 
-        self.collection.add(documents=chunks, ids=ids)
-        return len(chunks)
+    @staticmethod
+    def _manifest_entry(file_path: str, chunk_ids: List[str], duplicates: Optional[Dict[str, str]] = None) -> dict:
+        """
+        chunk_ids: chunk sumber yang ada di index; duplicates: chunk yang di-drop -> chunk
+        penggantinya. Jika pengganti hilang (sumber lain diubah/dihapus), sumber ini dimuat ulang.
+        """
+        stat = os.stat(file_path)
+        return {"mtime": stat.st_mtime, "size": stat.st_size, "chunk_ids": chunk_ids, "duplicates": duplicates or {}}
 
+    @staticmethod
+    def _entry_indexed(entry: dict, active_ids: Set[str]) -> bool:
+        """Semua chunk sumber (atau pengganti duplikatnya) masih ada di versi aktif"""
+        duplicates = entry.get("duplicates", {})
+        if not entry["chunk_ids"] and not duplicates:
+            return False
+        return set(entry["chunk_ids"]) <= active_ids and set(duplicates.values()) <= active_ids
 
-    def get_context_for_question(self, question: str, top_k: int = 5, max_chars: int = 1500) -> str:
-        if not self.collection:
-            self.collection = self.client.get_or_create_collection(
-                name="kitab_psikolog",
-                embedding_function=self.embedding_fn
+    def _manifest_path(self) -> str:
+        return os.path.join(self.backend.root, MANIFEST_FILENAME)
+
+    def _read_manifest(self) -> dict:
+        if not os.path.exists(self._manifest_path()):
+            return {}
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f).get("sources", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read corpus manifest, re-indexing everything: {e}")
+            return {}
+
+    def _write_manifest(self, sources: dict, version: Optional[str]):
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": version, "sources": sources}, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _copy_chunks(self, source_index, target_index, ids, deduplicator: Optional[ChunkDeduplicator] = None):
+        """Salin chunk (dokumen, metadata, embedding) antar versi index tanpa re-embed"""
+        for start in range(0, len(ids), INDEX_BATCH_SIZE):
+            batch = source_index.get(ids[start:start + INDEX_BATCH_SIZE])
+            if deduplicator:
+                deduplicator.add_reference(zip(batch["ids"], batch["documents"]))
+            target_index.add(
+                ids=batch["ids"],
+                documents=batch["documents"],
+                metadatas=batch["metadatas"],
+                embeddings=batch["embeddings"]
             )
 
-        results = self.collection.query(query_texts=[question], n_results=top_k)
-        docs = results["documents"][0]
-
-        # gabungkan context
-        context = "\n".join(docs)
-        return context[:max_chars]
-
-    def chunk_texts(self, texts, chunk_size=500):
-        chunks, current = [], ""
-        for txt in texts:
-            if len(current) + len(txt) < chunk_size:
-                current += " " + txt
-            else:
-                chunks.append(current.strip())
-                current = txt
-        if current:
-            chunks.append(current.strip())
-        return chunks
+    def _add_chunks(self, index, chunks: Dict[str, Tuple[str, dict]]):
+        """Embed lalu tambahkan chunk baru ke index per batch"""
+        ids = list(chunks)
+        for start in range(0, len(ids), INDEX_BATCH_SIZE):
+            batch_ids = ids[start:start + INDEX_BATCH_SIZE]
+            documents = [chunks[chunk_id][0] for chunk_id in batch_ids]
+            index.add(
+                ids=batch_ids,
+                documents=documents,
+                metadatas=[chunks[chunk_id][1] for chunk_id in batch_ids],
+                embeddings=self.embedding_fn.embed_documents(documents)
+            )
+
+    def _validate_index(self, index):
+        """Smoke query: versi baru harus berisi dan bisa menjawab query sebelum diaktifkan"""
+        if index.count() == 0:
+            raise ValueError("New index version is empty")
+        query_embedding = self.embedding_fn.embed_documents([settings.RAG_SMOKE_QUERY])[0]
+        if not index.query(query_embedding, n_results=1):
+            raise ValueError("Smoke query on new index version returned no documents")
+
+    def _activate(self, version: str, index):
+        """Tulis pointer versi aktif secara atomik lalu swap index yang dipakai retrieval"""
+        lexical_index = self._build_lexical_index(index)
+        write_active_version(self.backend.root, version)
+
+        with self._swap_lock:
+            previous_version = self.index_version
+            self.previous_index_version = previous_version
+            self._active_mtime = active_version_mtime(self.backend.root)
+            self.index = index
+            self.lexical_index = lexical_index
+            self.index_version = version
+            # Hasil retrieval versi lama tidak akan pernah cocok lagi
+            self.context_cache.clear()
+
+        logger.info(f"Active index switched from {previous_version} to {version}")
+        # Beri waktu query yang masih memakai versi lama untuk selesai sebelum dihapus
+        timer = threading.Timer(settings.RAG_INDEX_GC_GRACE_SECONDS, self.gc_stale_versions)
+        timer.daemon = True
+        timer.start()
+
+    def gc_stale_versions(self, keep_previous: bool = False):
+        """
+        Hapus semua versi index selain versi aktif. Dipanggil oleh timer setelah swap, dan
+        langsung oleh CLI build karena proses CLI keluar sebelum timer sempat berjalan.
+        keep_previous=True: versi sebelum swap terakhir juga dipertahankan, karena worker
+        aplikasi lain masih melayani query dari versi itu sampai query berikutnya.
+        """
+        # Tunggu build yang sedang berjalan agar versi yang sedang dibangun tidak ikut terhapus
+        with self._build_lock:
+            # Pointer di disk bisa lebih baru dari versi proses ini (di-publish proses lain)
+            keep = [read_active_version(self.backend.root), self.index_version]
+            if keep_previous:
+                keep.append(self.previous_index_version)
+            self.backend.drop_stale(*keep)
+
+    def _get_active_index(self):
+        """
+        Index versi aktif. Pointer file dicek lewat mtime di setiap pemanggilan sehingga versi
+        yang di-publish proses lain (mis. `rag_cli.py build`) langsung dipakai tanpa restart.
+        """
+        with self._swap_lock:
+            mtime = active_version_mtime(self.backend.root)
+            if self.index is not None and mtime == self._active_mtime:
+                return self.index
+            self._active_mtime = mtime
+
+            version = read_active_version(self.backend.root)
+            if self.index is not None and (version is None or version == self.index_version):
+                return self.index
+            index = self.backend.open(version) if version else None
+            if version and index is None:
+                logger.warning(f"Active index version {version} not found")
+                if self.index is not None:
+                    return self.index
+            if index is None:
+                # Fallback ke collection lama tanpa versi (hanya ada di backend Chroma)
+                index, version = self.backend.open(None), None
+            if index is not None:
+                previous_version = self.index_version
+                self.lexical_index = self._build_lexical_index(index)
+                self.index, self.index_version = index, version
+                if previous_version is not None:
+                    self.context_cache.clear()
+                    logger.info(f"Active index reloaded from pointer: {previous_version} -> {version}")
+            return self.index
+
+    @staticmethod
+    def _build_lexical_index(index) -> Optional[BM25Index]:
+        """Inverted index BM25 yang dibangun dari isi versi index yang sama"""
+        if not settings.RAG_HYBRID_ENABLED:
+            return None
+        lexical_index = BM25Index(*index.all_documents())
+        logger.info(f"BM25 index built with {len(lexical_index)} chunks and {len(lexical_index.idf)} terms")
+        return lexical_index
+
+    def _active_snapshot(self):
+        """Index vektor, index leksikal, dan versi aktif yang konsisten satu sama lain"""
+        with self._swap_lock:
+            return self._get_active_index(), self.lexical_index, self.index_version
+
+    def retrieve(self, question: str, top_k: int = 5) -> List[SearchHit]:
+        """
+        Ambil chunk paling relevan. Jika hybrid aktif, kandidat dari pencarian vektor
+        dan BM25 digabung dengan reciprocal rank fusion; jika rerank aktif, kandidat
+        diurutkan ulang dengan cross-encoder.
+        """
+        index, lexical_index, _ = self._active_snapshot()
+        if index is None:
+            return []
+        return self._ranked_candidates(index, lexical_index, question, top_k)[:top_k]
+
+    def _ranked_candidates(self, index, lexical_index, question: str, top_k: int) -> List[SearchHit]:
+        """Kandidat terurut; over-fetch saat rerank aktif agar passage terbaik punya peluang masuk"""
+        if not self.reranker:
+            return self._retrieve(index, lexical_index, question, top_k)
+        candidates = self._retrieve(index, lexical_index, question, max(top_k, settings.RAG_RERANK_CANDIDATES))
+        return self.reranker.rerank(question, candidates, budget_ms=settings.RAG_RERANK_BUDGET_MS)
+
+    def _retrieve(self, index, lexical_index, question: str, n_results: int) -> List[SearchHit]:
+        # Embedding query lewat batcher agar request bersamaan di-encode sekaligus
+        query_embedding = self.embedding_fn.embed_query(question)
+        if lexical_index is None:
+            return index.query(query_embedding, n_results=n_results)
+
+        candidates = max(n_results, settings.RAG_HYBRID_CANDIDATES)
+        vector_hits = index.query(query_embedding, n_results=candidates)
+        lexical_hits = lexical_index.search(question, n_results=candidates)
+        return reciprocal_rank_fusion([vector_hits, lexical_hits], k=settings.RAG_RRF_K)[:n_results]
+
+    @staticmethod
+    def _candidate_embeddings(index, hits: List[SearchHit]):
+        """Embedding tersimpan untuk kandidat (urut sesuai hits), dipakai MMR; None jika tidak lengkap"""
+        import numpy as np
+
+        data = index.get([hit.id for hit in hits])
+        embeddings = data.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return None
+        by_id = dict(zip(data["ids"], embeddings))
+        if any(hit.id not in by_id for hit in hits):
+            return None
+        return np.asarray([by_id[hit.id] for hit in hits], dtype=np.float32)
+
+    def get_context(self, question: str, top_k: int = 5, token_budget: Optional[int] = None) -> ContextResult:
+        """
+        Konteks untuk LLM: maksimal top_k passage utuh yang dipilih dengan MMR dari kandidat
+        retrieval dan muat di token_budget (default RAG_CONTEXT_TOKEN_BUDGET). Setiap passage
+        diberi label [n] agar jawaban bisa mensitasi sumbernya.
+        """
+        index, lexical_index, version = self._active_snapshot()
+        if index is None:
+            return ContextResult()
+
+        token_budget = token_budget or settings.RAG_CONTEXT_TOKEN_BUDGET
+        cache_key = (TextUtils.normalize_question(question), top_k, token_budget, version)
+        cached = self.context_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        hits = self._ranked_candidates(index, lexical_index, question, max(top_k, settings.RAG_MMR_CANDIDATES))
+        try:
+            embeddings = self._candidate_embeddings(index, hits) if len(hits) > 1 else None
+        except Exception as e:
+            logger.warning(f"Could not load candidate embeddings for MMR: {e}")
+            embeddings = None
+        result = self.context_packer.pack(hits, embeddings, max_passages=top_k, token_budget=token_budget)
+        if result.text:
+            self.context_cache.set(cache_key, result)
+        return result
+
+    def get_context_for_question(self, question: str, top_k: int = 5, token_budget: Optional[int] = None) -> str:
+        return self.get_context(question, top_k=top_k, token_budget=token_budget).text
+
+    async def aget_context(self, question: str, top_k: int = 5, token_budget: Optional[int] = None) -> ContextResult:
+        """Versi async dari get_context, dijalankan di executor retrieval."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self.get_context, question, top_k=top_k, token_budget=token_budget)
+        )
+
+    async def aembed_query(self, question: str) -> List[float]:
+        """Embedding pertanyaan (cache + batcher) tanpa memblokir event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.embedding_fn.embed_query, question)
+
+    def cache_stats(self) -> dict:
+        """Statistik cache RAG untuk monitoring"""
+        return {
+            "query_embedding": self.embedding_fn.query_cache.stats(),
+            "context": self.context_cache.stats(),
+        }
+
+    def shutdown(self):
+        """Hentikan executor retrieval (dipanggil saat aplikasi shutdown)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._build_executor.shutdown(wait=False, cancel_futures=True)
+        self.embedding_fn.batcher.close()
+
+    def chunk_texts(self, texts, chunk_size=None):
+        """Chunk list paragraf menjadi list teks (tanpa metadata halaman)"""
+        chunker = self.chunker
+        if chunk_size is not None and chunk_size != chunker.max_size:
+            chunker = SentenceChunker(max_size=chunk_size, overlap=settings.RAG_CHUNK_OVERLAP,
+                                      unit=settings.RAG_CHUNK_UNIT)
+        return [chunk.text for chunk in chunker.chunk_paragraphs(texts)]
 
 # singleton
 rag_service = RagService()
@@ -0,0 +1,161 @@
+# src/services/rate_limiter.py
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitTimeout(Exception):
+    """Request menunggu antrean rate limiter lebih lama dari max_wait"""
+
+
+class RateLimited(Exception):
+    """OpenRouter tetap membalas 429: kuota berlaku untuk seluruh akun, bukan kegagalan model"""
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Header Retry-After: detik atau HTTP-date -> detik dari sekarang"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    Header X-RateLimit-Reset -> detik dari sekarang. OpenRouter mengirim epoch milidetik;
+    epoch detik dan jumlah detik relatif juga diterima.
+    """
+    if not value:
+        return None
+    try:
+        reset = float(value)
+    except ValueError:
+        return None
+    if reset > 1e12:
+        return max(0.0, reset / 1000 - time.time())
+    if reset > 1e9:
+        return max(0.0, reset - time.time())
+    return max(0.0, reset)
+
+
+class OutboundRateLimiter:
+    """
+    Rate limiter global (per proses) untuk request keluar ke LLM: token bucket
+    (`rate` request/detik, kapasitas `burst`) plus batas request bersamaan.
+    Request yang menunggu dilayani FIFO dan menyerah setelah `max_wait` detik.
+    Respons 429 / header rate limit menjeda semua pengirim sekaligus sampai waktu
+    yang diminta server (Retry-After, X-RateLimit-Reset), bukan backoff per request.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 10, max_concurrency: int = 20,
+                 max_wait: float = 30.0, default_pause: float = 2.0, max_pause: float = 60.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self.default_pause = default_pause
+        self.max_pause = max_pause
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        # asyncio.Lock melayani waiter sesuai urutan datang -> antrean FIFO
+        self._queue = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self._stats = {"acquired": 0, "throttled": 0, "timeouts": 0, "rate_limited": 0}
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        else:
+            self._tokens = float(self.burst)
+        self._refilled_at = now
+
+    def _delay(self) -> float:
+        """Waktu tunggu sampai boleh mengirim: jeda global atau token bucket kosong"""
+        now = time.monotonic()
+        self._refill(now)
+        pause = self._paused_until - now
+        deficit = (1 - self._tokens) / self.rate if self._tokens < 1 and self.rate > 0 else 0.0
+        return max(pause, deficit, 0.0)
+
+    async def _acquire(self):
+        async with self._queue:
+            # Hanya kepala antrean yang memegang lock; yang lain menunggu di belakangnya
+            await self._slots.acquire()
+            try:
+                throttled = False
+                while (delay := self._delay()) > 0:
+                    throttled = True
+                    await asyncio.sleep(delay)
+                self._tokens -= 1
+            except BaseException:
+                self._slots.release()
+                raise
+            if throttled:
+                self._stats["throttled"] += 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Izin satu request keluar; raise RateLimitTimeout jika antrean melebihi max_wait"""
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise RateLimitTimeout(f"Waited more than {self.max_wait}s for an outbound LLM slot")
+        finally:
+            self._waiting -= 1
+        self._stats["acquired"] += 1
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    def pause(self, seconds: float, reason: str = ""):
+        """Jeda semua pengirim selama `seconds` (dibatasi max_pause); jeda yang lebih lama dipertahankan"""
+        seconds = min(max(0.0, seconds), self.max_pause)
+        until = time.monotonic() + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+            logger.warning(f"Pausing outbound LLM requests for {seconds:.1f}s{f' ({reason})' if reason else ''}")
+
+    def observe(self, response):
+        """Baca status dan header rate limit dari respons OpenRouter"""
+        headers = response.headers
+        if response.status_code == 429:
+            self._stats["rate_limited"] += 1
+            delay = _parse_retry_after(headers.get("retry-after"))
+            if delay is None:
+                delay = _parse_reset(headers.get("x-ratelimit-reset"))
+            self.pause(self.default_pause if delay is None else delay, "429 Too Many Requests")
+            return
+        remaining = headers.get("x-ratelimit-remaining")
+        if remaining is not None and remaining.strip() in ("0", "0.0"):
+            delay = _parse_reset(headers.get("x-ratelimit-reset"))
+            if delay:
+                self.pause(delay, "rate limit quota exhausted")
+
+    def stats(self) -> dict:
+        delay = self._delay()
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "tokens": round(self._tokens, 2),
+            "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "next_slot_in_s": round(delay, 2),
+        }
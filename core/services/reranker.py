@@ -0,0 +1,58 @@
+# src/services/reranker.py
+import logging
+import threading
+import time
+from typing import List
+
+from core.services.vector_store import SearchHit
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Rerank kandidat retrieval dengan cross-encoder kecil di bawah batas waktu.
+    Kandidat di-skor per batch; jika anggaran waktu habis, kandidat yang belum
+    di-skor tetap memakai urutan vektor di belakang kandidat yang sudah di-skor.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 8):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+                    logger.info(f"Cross-encoder '{self.model_name}' loaded successfully.")
+        return self._model
+
+    def warm_up(self):
+        self.model.predict([("kesehatan mental", "kesehatan mental")])
+
+    def rerank(self, query: str, hits: List[SearchHit], budget_ms: float) -> List[SearchHit]:
+        if len(hits) <= 1:
+            return hits
+
+        deadline = time.monotonic() + budget_ms / 1000.0
+        scores: List[float] = []
+        for start in range(0, len(hits), self.batch_size):
+            if time.monotonic() >= deadline:
+                break
+            batch = hits[start:start + self.batch_size]
+            scores.extend(float(score) for score in self.model.predict([(query, hit.text) for hit in batch]))
+
+        if len(scores) < len(hits):
+            logger.info(f"Rerank budget {budget_ms}ms exhausted after {len(scores)}/{len(hits)} candidates")
+        if not scores:
+            return hits
+
+        scored = sorted(zip(hits[:len(scores)], scores), key=lambda item: item[1], reverse=True)
+        reranked = [SearchHit(id=hit.id, text=hit.text, metadata=hit.metadata, score=score) for hit, score in scored]
+        return reranked + hits[len(scores):]
@@ -0,0 +1,95 @@
+# src/services/topic_classifier.py
+import logging
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Contoh pertanyaan yang termasuk cakupan bot (psikologi, kesehatan mental, kesejahteraan kerja)
+ON_TOPIC_SEEDS = [
+    "bagaimana cara mengatasi stres kerja",
+    "apa tanda-tanda burnout pada perawat",
+    "saya merasa cemas terus-menerus, apa yang harus saya lakukan",
+    "apa itu depresi dan bagaimana gejalanya",
+    "cara menjaga kesehatan mental setelah shift malam",
+    "bagaimana menghadapi perundungan di tempat kerja",
+    "tips tidur nyenyak saat insomnia",
+    "bagaimana meningkatkan motivasi dan kepercayaan diri",
+    "arti skor GAD-7, K10, WHO-5, atau MBI saya",
+    "teknik relaksasi untuk menenangkan pikiran",
+    "bagaimana cara meminta dukungan dari rekan kerja atau konselor",
+    "pola makan dan olahraga yang baik untuk kesehatan",
+    "saya merasa lelah secara emosional dan kehilangan semangat",
+    "bagaimana menyeimbangkan pekerjaan dan kehidupan pribadi",
+]
+
+# Contoh pertanyaan di luar cakupan
+OFF_TOPIC_SEEDS = [
+    "siapa presiden pertama indonesia",
+    "resep nasi goreng yang enak",
+    "bagaimana cara membuat program python",
+    "skor pertandingan sepak bola tadi malam",
+    "harga saham hari ini",
+    "rekomendasi film terbaru",
+    "cara memperbaiki motor yang mogok",
+    "terjemahkan kalimat ini ke bahasa inggris",
+    "berapa hasil 125 dikali 48",
+    "cuaca besok di jakarta",
+    "tuliskan puisi tentang laut",
+    "bagaimana cara membuat website dengan javascript",
+]
+
+
+def _centroid(embeddings: Sequence[Sequence[float]]) -> np.ndarray:
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    centroid = matrix.mean(axis=0)
+    return centroid / max(float(np.linalg.norm(centroid)), 1e-12)
+
+
+class TopicClassifier:
+    """
+    Klasifikasi topik berbasis kemiripan embedding pertanyaan terhadap centroid contoh
+    on-topic dan off-topic. Pertanyaan dianggap on-topic jika cosine ke centroid on-topic
+    minimal min_similarity dan lebih besar dari cosine ke centroid off-topic + margin.
+    Centroid dihitung sekali saat warm-up dengan model embedding yang sama dengan RAG.
+    """
+
+    def __init__(self, embedding_fn, min_similarity: float = 0.25, margin: float = 0.0,
+                 on_topic_seeds: Optional[List[str]] = None, off_topic_seeds: Optional[List[str]] = None):
+        self.embedding_fn = embedding_fn
+        self.min_similarity = min_similarity
+        self.margin = margin
+        self.on_topic_seeds = on_topic_seeds or ON_TOPIC_SEEDS
+        self.off_topic_seeds = off_topic_seeds or OFF_TOPIC_SEEDS
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._centroids is not None
+
+    def warm_up(self):
+        with self._lock:
+            if self._centroids is not None:
+                return
+            embeddings = self.embedding_fn.embed_documents(self.on_topic_seeds + self.off_topic_seeds)
+            split = len(self.on_topic_seeds)
+            self._centroids = np.stack([_centroid(embeddings[:split]), _centroid(embeddings[split:])])
+            logger.info(f"Topic classifier ready ({split} on-topic, {len(embeddings) - split} off-topic seeds)")
+
+    def scores(self, embedding: Sequence[float]):
+        """(cosine ke centroid on-topic, cosine ke centroid off-topic)"""
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        on_topic, off_topic = self._centroids @ query
+        return float(on_topic), float(off_topic)
+
+    def is_on_topic(self, embedding: Sequence[float]) -> Optional[bool]:
+        """True/False, atau None jika centroid belum siap (pemanggil memakai jalur lama)"""
+        if self._centroids is None:
+            return None
+        on_topic, off_topic = self.scores(embedding)
+        return on_topic >= self.min_similarity and on_topic >= off_topic + self.margin
@@ -0,0 +1,287 @@
+# src/services/vector_store.py
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# File pointer versi aktif di root setiap backend
+ACTIVE_INDEX_FILENAME = "active_index.json"
+
+
+@dataclass
+class SearchHit:
+    """Satu hasil retrieval; score semakin besar semakin relevan (cosine, BM25, atau RRF)"""
+    id: str
+    text: str
+    metadata: dict
+    score: float
+
+
+class ChromaIndex:
+    """Satu versi index yang disimpan sebagai collection ChromaDB"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.name = collection.name
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def ids_and_metadatas(self) -> Tuple[List[str], List[dict]]:
+        data = self.collection.get(include=["metadatas"])
+        return data["ids"], [m or {} for m in data["metadatas"] or []]
+
+    def all_documents(self) -> Tuple[List[str], List[str], List[dict]]:
+        data = self.collection.get(include=["documents", "metadatas"])
+        return data["ids"], data["documents"], [m or {} for m in data["metadatas"] or []]
+
+    def get(self, ids: Sequence[str]) -> dict:
+        return self.collection.get(ids=list(ids), include=["documents", "metadatas", "embeddings"])
+
+    def add(self, ids, documents, metadatas, embeddings):
+        self.collection.add(ids=list(ids), documents=list(documents),
+                            metadatas=list(metadatas), embeddings=embeddings)
+
+    def query(self, embedding: Sequence[float], n_results: int) -> List[SearchHit]:
+        results = self.collection.query(
+            query_embeddings=[list(embedding)],
+            n_results=n_results,
+            include=["documents", "metadatas", "distances"]
+        )
+        ids = results["ids"][0]
+        documents = results["documents"][0]
+        metadatas = (results.get("metadatas") or [[None] * len(ids)])[0]
+        distances = (results.get("distances") or [[0.0] * len(ids)])[0]
+        return [
+            SearchHit(id=i, text=doc, metadata=meta or {}, score=1.0 - float(dist))
+            for i, doc, meta, dist in zip(ids, documents, metadatas, distances)
+        ]
+
+
+class ChromaBackend:
+    """Backend ChromaDB: setiap versi index adalah satu collection"""
+    name = "chroma"
+
+    def __init__(self, root: str, collection_name: str, embedding_fn):
+        import chromadb
+
+        self.root = root
+        self.collection_name = collection_name
+        self.embedding_fn = embedding_fn
+        self.client = chromadb.PersistentClient(path=root)
+
+    def _name(self, version: Optional[str]) -> str:
+        return f"{self.collection_name}__v{version}" if version else self.collection_name
+
+    def open(self, version: Optional[str]) -> Optional[ChromaIndex]:
+        """Buka versi tertentu; version None = collection lama tanpa versi"""
+        try:
+            collection = self.client.get_collection(name=self._name(version), embedding_function=self.embedding_fn)
+        except Exception:
+            return None
+        return ChromaIndex(collection)
+
+    def create(self, version: str) -> ChromaIndex:
+        collection = self.client.create_collection(
+            name=self._name(version),
+            embedding_function=self.embedding_fn,
+            metadata={"hnsw:space": "cosine"}
+        )
+        return ChromaIndex(collection)
+
+    def finalize(self, index: ChromaIndex) -> ChromaIndex:
+        return index
+
+    def drop(self, index: ChromaIndex):
+        self.client.delete_collection(index.name)
+
+    def drop_stale(self, *keep_versions: Optional[str]):
+        """
+        Hapus semua collection versi lama kecuali keep_versions. None di keep_versions berarti
+        collection lama tanpa versi, yang masih dipakai retrieval sampai versi pertama aktif.
+        """
+        keep_names = {self._name(version) for version in keep_versions}
+        for collection in self.client.list_collections():
+            name = getattr(collection, "name", collection)
+            if name in keep_names or not name.startswith(self.collection_name):
+                continue
+            try:
+                self.client.delete_collection(name)
+                logger.info(f"Garbage-collected stale index collection '{name}'")
+            except Exception as e:
+                logger.warning(f"Failed to delete stale index collection '{name}': {e}")
+
+
+class NumpyFlatIndex:
+    """
+    Index flat: embedding ter-normalisasi di file .npy (dibuka dengan mmap) + sidecar JSON
+    berisi id, teks, dan metadata. Top-k dihitung dengan satu perkalian matriks-vektor,
+    sehingga beberapa worker uvicorn berbagi halaman memori lewat page cache OS.
+    """
+
+    def __init__(self, path: str, embeddings: np.ndarray, ids: List[str], documents: List[str], metadatas: List[dict]):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.embeddings = embeddings
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(ids)}
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyFlatIndex":
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(path, embeddings, meta["ids"], meta["documents"], meta["metadatas"])
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def ids_and_metadatas(self) -> Tuple[List[str], List[dict]]:
+        return list(self.ids), list(self.metadatas)
+
+    def all_documents(self) -> Tuple[List[str], List[str], List[dict]]:
+        return list(self.ids), list(self.documents), list(self.metadatas)
+
+    def get(self, ids: Sequence[str]) -> dict:
+        positions = [self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions]
+        return {
+            "ids": [self.ids[p] for p in positions],
+            "documents": [self.documents[p] for p in positions],
+            "metadatas": [self.metadatas[p] for p in positions],
+            "embeddings": np.asarray(self.embeddings[positions], dtype=np.float32),
+        }
+
+    def query(self, embedding: Sequence[float], n_results: int) -> List[SearchHit]:
+        if not self.ids:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        scores = np.asarray(self.embeddings @ query.astype(self.embeddings.dtype), dtype=np.float32)
+
+        n_results = min(n_results, len(self.ids))
+        top = np.argpartition(-scores, n_results - 1)[:n_results]
+        top = top[np.argsort(-scores[top])]
+        return [
+            SearchHit(id=self.ids[p], text=self.documents[p], metadata=self.metadatas[p], score=float(scores[p]))
+            for p in top
+        ]
+
+
+class NumpyIndexWriter:
+    """Mengumpulkan chunk untuk satu versi NumpyFlatIndex sebelum ditulis ke disk"""
+
+    def __init__(self, path: str, dtype: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.dtype = dtype
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[dict] = []
+        self._embeddings: List[np.ndarray] = []
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids, documents, metadatas, embeddings):
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+        self._embeddings.append(np.asarray(embeddings, dtype=np.float32))
+
+    def write(self) -> NumpyFlatIndex:
+        """Tulis ke direktori sementara lalu rename, agar versi tidak pernah terlihat setengah jadi"""
+        matrix = np.concatenate(self._embeddings) if self._embeddings else np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True) if matrix.size else None
+        if norms is not None:
+            matrix = matrix / np.where(norms == 0, 1, norms)
+
+        tmp_path = self.path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "embeddings.npy"), matrix.astype(self.dtype))
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return NumpyFlatIndex.load(self.path)
+
+
+class NumpyBackend:
+    """Backend NumPy: setiap versi index adalah satu direktori v<versi> di bawah root"""
+    name = "numpy"
+
+    def __init__(self, root: str, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported numpy index dtype: {dtype}")
+        self.root = root
+        self.dtype = dtype
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, version: str) -> str:
+        return os.path.join(self.root, f"v{version}")
+
+    def open(self, version: Optional[str]) -> Optional[NumpyFlatIndex]:
+        if not version or not os.path.isdir(self._path(version)):
+            return None
+        try:
+            return NumpyFlatIndex.load(self._path(version))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not open numpy index version {version}: {e}")
+            return None
+
+    def create(self, version: str) -> NumpyIndexWriter:
+        return NumpyIndexWriter(self._path(version), self.dtype)
+
+    def finalize(self, writer: NumpyIndexWriter) -> NumpyFlatIndex:
+        return writer.write()
+
+    def drop(self, index):
+        shutil.rmtree(index.path, ignore_errors=True)
+        shutil.rmtree(index.path + ".tmp", ignore_errors=True)
+
+    def drop_stale(self, *keep_versions: Optional[str]):
+        keep_names = {os.path.basename(self._path(version)) for version in keep_versions if version}
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name in keep_names or not name.startswith("v") or not os.path.isdir(path):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Garbage-collected stale numpy index '{name}'")
+
+
+def read_active_version(root: str) -> Optional[str]:
+    path = os.path.join(root, ACTIVE_INDEX_FILENAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read active index pointer: {e}")
+        return None
+
+
+def active_version_mtime(root: str) -> Optional[int]:
+    """mtime (ns) file pointer versi aktif; murah untuk dicek di setiap query"""
+    try:
+        return os.stat(os.path.join(root, ACTIVE_INDEX_FILENAME)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def write_active_version(root: str, version: str):
+    """Tulis pointer versi aktif secara atomik"""
+    path = os.path.join(root, ACTIVE_INDEX_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version}, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,105 @@
+"""
+CLI offline untuk index RAG.
+
+    python rag_cli.py build [--corpus DIR] [--full]
+    python rag_cli.py bench questions.jsonl [-k 5] [--output hasil.json]
+    python rag_cli.py parity
+
+`build` membangun / memperbarui index dari direktori korpus dan melaporkan throughput
+ingestion; `bench` mengukur recall@k, MRR, dan latensi query dari file pertanyaan berlabel;
+`parity` membandingkan embedding EMBEDDING_BACKEND dengan PyTorch penuh (cosine per sampel).
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from common.config.settings import settings
+
+
+def build(args) -> int:
+    from core.services.rag_service import rag_service
+
+    if not os.path.isdir(args.corpus):
+        print(f"Corpus directory not found: {args.corpus}", file=sys.stderr)
+        return 1
+
+    report = rag_service.build_corpus(args.corpus, full=args.full)
+    # Timer GC di dalam service tidak sempat berjalan sebelum proses CLI keluar. Versi sebelumnya
+    # dipertahankan: worker aplikasi masih memakainya sampai query berikutnya membaca pointer baru
+    rag_service.gc_stale_versions(keep_previous=True)
+    summary = {
+        "version": report.version,
+        "sources_indexed": report.sources_indexed,
+        "sources_skipped": report.sources_skipped,
+        "sources_removed": report.sources_removed,
+        "sources_failed": report.sources_failed,
+        "pages_read": report.pages_read,
+        "chunks_loaded": report.chunks_loaded,
+        "chunks_total": report.chunks_total,
+        "chunks_added": report.chunks_added,
+        "chunks_removed": report.chunks_removed,
+        "duplicates_dropped": len(report.duplicates),
+        "load_seconds": round(report.load_seconds, 3),
+        "embed_seconds": round(report.embed_seconds, 3),
+        "total_seconds": round(report.total_seconds, 3),
+        **report.throughput(),
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 0
+
+
+def bench(args) -> int:
+    from core.services.rag_benchmark import load_questions, run_benchmark
+    from core.services.rag_service import rag_service
+
+    questions = load_questions(args.questions)
+    # Model dan index dimuat di luar pengukuran latensi
+    rag_service.warm_up()
+    if not rag_service.is_ready:
+        print(f"RAG not ready: {rag_service.readiness_error}", file=sys.stderr)
+        return 1
+
+    result = run_benchmark(rag_service, questions, k=args.k)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    return 0
+
+
+def parity(args) -> int:
+    from core.services.rag_service import rag_service
+
+    report = rag_service.embedding_fn.check_parity()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if report["passed"] else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build dan benchmark index RAG")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Bangun / perbarui index dari direktori korpus")
+    build_parser.add_argument("--corpus", default=settings.RAG_CORPUS_DIR, help="Direktori dokumen PDF/DOCX/TXT")
+    build_parser.add_argument("--full", action="store_true", help="Abaikan manifest dan embed ulang semua chunk")
+    build_parser.set_defaults(func=build)
+
+    bench_parser = subparsers.add_parser("bench", help="Benchmark retrieval dari file pertanyaan berlabel")
+    bench_parser.add_argument("questions", help="File JSONL: {\"question\": ..., \"relevant\": [...]}")
+    bench_parser.add_argument("-k", type=int, default=5, help="Jumlah hasil yang dinilai (recall@k)")
+    bench_parser.add_argument("--output", help="Simpan hasil benchmark sebagai JSON")
+    bench_parser.set_defaults(func=bench)
+
+    parity_parser = subparsers.add_parser("parity", help="Cek kesamaan embedding backend aktif dengan PyTorch")
+    parity_parser.set_defaults(func=parity)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
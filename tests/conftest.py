@@ -0,0 +1,5 @@
+import os
+
+# Settings menolak start tanpa secret; nilai dummy cukup untuk unit test
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("INTERNAL_BOT_TOKEN", "test-internal-token")
@@ -0,0 +1,53 @@
+import time
+
+from core.services.answer_cache import SemanticAnswerCache
+
+PROFILE = "Tingkat risiko keseluruhan: sedang\nGAD-7 (Kecemasan): Kategori: Sedang"
+
+
+def test_similar_question_in_same_bucket_hits():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.set([1, 0, 0], PROFILE, "fp", "jawaban")
+    assert cache.get([0.99, 0.05, 0], PROFILE, "fp") == "jawaban"
+    assert cache.stats()["hits"] == 1
+
+
+def test_dissimilar_question_misses():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.set([1, 0, 0], PROFILE, "fp", "jawaban")
+    assert cache.get([0, 1, 0], PROFILE, "fp") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_answers_are_not_shared_across_buckets():
+    cache = SemanticAnswerCache()
+    cache.set([1, 0], PROFILE, "fp", "jawaban profil")
+    assert cache.get([1, 0], "tanpa-profil", "fp") is None
+    assert cache.get([1, 0], PROFILE.replace("sedang", "tinggi"), "fp") is None
+
+
+def test_fingerprint_change_invalidates_everything():
+    cache = SemanticAnswerCache()
+    cache.set([1, 0], "tanpa-profil", "index-v1", "jawaban")
+    assert cache.get([1, 0], "tanpa-profil", "index-v2") is None
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = SemanticAnswerCache(maxsize=2)
+    cache.set([1, 0, 0], "b", "fp", "satu")
+    cache.set([0, 1, 0], "b", "fp", "dua")
+    assert cache.get([1, 0, 0], "b", "fp") == "satu"
+    cache.set([0, 0, 1], "b", "fp", "tiga")
+    assert cache.get([0, 1, 0], "b", "fp") is None
+    assert cache.get([1, 0, 0], "b", "fp") == "satu"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_dropped():
+    cache = SemanticAnswerCache(ttl=0.01)
+    cache.set([1, 0], "b", "fp", "jawaban")
+    time.sleep(0.02)
+    assert cache.get([1, 0], "b", "fp") is None
+    assert len(cache) == 0
@@ -0,0 +1,50 @@
+import pytest
+
+from core.services.chunk_dedup import ChunkDeduplicator
+
+PARAGRAPH = (
+    "Burnout adalah kondisi kelelahan emosional, sinisme, dan menurunnya pencapaian pribadi "
+    "yang muncul akibat stres kerja berkepanjangan yang tidak dikelola dengan baik oleh individu"
+)
+
+
+def chunks(**texts):
+    return {chunk_id: (text, {"source": f"{chunk_id}.pdf"}) for chunk_id, text in texts.items()}
+
+
+def test_num_perm_must_divide_into_bands():
+    with pytest.raises(ValueError):
+        ChunkDeduplicator(num_perm=10, bands=3)
+
+
+def test_exact_duplicate_ignores_case_and_whitespace():
+    kept, dropped = ChunkDeduplicator().deduplicate(chunks(a=PARAGRAPH, b="  " + PARAGRAPH.upper()))
+    assert list(kept) == ["a"]
+    assert dropped[0].id == "b" and dropped[0].duplicate_of == "a" and dropped[0].reason == "exact"
+
+
+def test_near_duplicate_is_dropped():
+    variant = PARAGRAPH.replace("individu", "individu tersebut")
+    kept, dropped = ChunkDeduplicator(threshold=0.7).deduplicate(chunks(a=PARAGRAPH, b=variant))
+    assert list(kept) == ["a"]
+    assert dropped[0].reason == "near" and 0.7 <= dropped[0].similarity < 1.0
+
+
+def test_distinct_chunks_are_kept():
+    other = "Tidur yang cukup dan olahraga teratur membantu pemulihan energi setelah shift malam panjang"
+    kept, dropped = ChunkDeduplicator().deduplicate(chunks(a=PARAGRAPH, b=other))
+    assert list(kept) == ["a", "b"] and dropped == []
+
+
+def test_references_are_never_dropped_but_match_new_chunks():
+    deduplicator = ChunkDeduplicator()
+    deduplicator.add_reference([("lama", PARAGRAPH)])
+    kept, dropped = deduplicator.deduplicate(chunks(baru=PARAGRAPH))
+    assert kept == {}
+    assert dropped[0].duplicate_of == "lama"
+
+
+def test_short_chunks_only_use_exact_matching():
+    kept, dropped = ChunkDeduplicator().deduplicate(chunks(a="Halaman 1", b="Halaman 2", c="halaman 1"))
+    assert list(kept) == ["a", "b"]
+    assert [d.id for d in dropped] == ["c"]
@@ -0,0 +1,123 @@
+import pytest
+
+from common.utils.chunker import Chunk, SentenceChunker
+
+
+def sentences(count, words=6):
+    return [" ".join(f"kata{i}" for _ in range(words)) + f" kalimat{i}." for i in range(count)]
+
+
+def test_rejects_unknown_unit():
+    with pytest.raises(ValueError):
+        SentenceChunker(unit="pages")
+
+
+def test_chunks_respect_max_size():
+    chunker = SentenceChunker(max_size=120, overlap=0)
+    chunks = list(chunker.chunk_paragraphs([" ".join(sentences(20))]))
+    assert len(chunks) > 1
+    assert all(len(chunk.text) <= 120 for chunk in chunks)
+
+
+def test_chunks_end_on_sentence_boundaries():
+    chunker = SentenceChunker(max_size=120, overlap=0)
+    for chunk in chunker.chunk_paragraphs([" ".join(sentences(20))]):
+        assert chunk.text.endswith(".")
+
+
+def test_overlap_carries_trailing_sentences():
+    chunker = SentenceChunker(max_size=150, overlap=60)
+    chunks = list(chunker.chunk_paragraphs([" ".join(sentences(10))]))
+    for previous, current in zip(chunks, chunks[1:]):
+        last_sentence = previous.text.rsplit(". ", 1)[-1]
+        assert current.text.startswith(last_sentence.rstrip("."))
+
+
+def test_without_overlap_nothing_is_lost_or_repeated():
+    text = " ".join(sentences(15))
+    chunker = SentenceChunker(max_size=100, overlap=0)
+    assert " ".join(chunk.text for chunk in chunker.chunk_paragraphs([text])) == text
+
+
+def test_lines_are_rejoined_into_sentences():
+    chunker = SentenceChunker(max_size=500, overlap=0)
+    pages = [(1, ["Burnout adalah kelelahan", "emosional akibat kerja.", "Stres perlu dikelola."])]
+    chunks = list(chunker.chunk_pages(pages))
+    assert [chunk.text for chunk in chunks] == [
+        "Burnout adalah kelelahan emosional akibat kerja. Stres perlu dikelola."
+    ]
+
+
+def test_page_range_follows_sentences_across_pages():
+    chunker = SentenceChunker(max_size=200, overlap=0)
+    pages = [
+        (1, ["Kalimat pertama di halaman satu."]),
+        (2, ["Kalimat ini dimulai di halaman dua", "tetapi selesai di halaman"]),
+        (3, ["tiga."]),
+    ]
+    chunks = list(chunker.chunk_pages(pages))
+    # Packing mulai ulang di halaman baru; kalimat yang menyeberang halaman membawa rentangnya
+    assert [(chunk.page_start, chunk.page_end) for chunk in chunks] == [(1, 1), (2, 3)]
+
+
+def test_oversized_sentence_is_split_on_words():
+    chunker = SentenceChunker(max_size=50, overlap=0)
+    long_sentence = " ".join(["panjang"] * 40) + "."
+    chunks = list(chunker.chunk_paragraphs([long_sentence]))
+    assert len(chunks) > 1
+    assert all(len(chunk.text) <= 50 for chunk in chunks)
+    assert " ".join(chunk.text for chunk in chunks) == long_sentence
+
+
+def test_text_without_punctuation_is_forced_into_chunks():
+    chunker = SentenceChunker(max_size=80, overlap=0)
+    lines = [f"baris tabel nomor {i}" for i in range(30)]
+    chunks = list(chunker.chunk_pages([(5, lines)]))
+    assert len(chunks) > 1
+    assert all(len(chunk.text) <= 80 for chunk in chunks)
+    assert all(chunk.page_start == 5 for chunk in chunks)
+
+
+def test_token_unit_uses_estimated_tokens():
+    chunker = SentenceChunker(max_size=30, overlap=0, unit="tokens")
+    chunks = list(chunker.chunk_paragraphs([" ".join(sentences(20))]))
+    assert len(chunks) > 1
+    # ~4 karakter per token
+    assert all(len(chunk.text) <= 30 * 4 for chunk in chunks)
+
+
+def test_chunk_metadata_omits_missing_pages():
+    assert Chunk("teks").metadata() == {}
+    assert Chunk("teks", page_start=3).metadata() == {"page_start": 3, "page_end": 3}
+
+
+def sentence_list(count):
+    # Panjang kalimat seragam: packing greedy tanpa jangkar tidak pernah sinkron kembali
+    return [f"Kalimat nomor {i:04d} membahas topik yang sama panjangnya." for i in range(count)]
+
+
+def changed_chunks(before, after, chunker):
+    old = {chunk.text for chunk in chunker.chunk_pages(before)}
+    new = [chunk.text for chunk in chunker.chunk_pages(after)]
+    return sum(1 for text in new if text not in old), len(new)
+
+
+def test_edit_near_start_only_changes_nearby_chunks_in_one_paragraph():
+    chunker = SentenceChunker(max_size=300, overlap=60)
+    sentences = sentence_list(2000)
+    edited = list(sentences)
+    edited[5] = edited[5].replace("membahas", "membahas secara jauh lebih panjang dan rinci")
+    changed, total = changed_chunks([(None, [" ".join(sentences)])], [(None, [" ".join(edited)])], chunker)
+    assert total > 100
+    assert changed <= 3
+
+
+def test_edit_stays_on_its_page():
+    chunker = SentenceChunker(max_size=300, overlap=60)
+    sentences = sentence_list(400)
+    pages = [(page + 1, sentences[page * 40:(page + 1) * 40]) for page in range(10)]
+    edited = [(page, list(lines)) for page, lines in pages]
+    edited[0][1][3] += " Tambahan kalimat baru di halaman pertama."
+    changed, total = changed_chunks(pages, edited, chunker)
+    first_page = sum(1 for chunk in chunker.chunk_pages(edited) if chunk.page_start == 1)
+    assert changed <= first_page < total
@@ -0,0 +1,50 @@
+import numpy as np
+
+from core.services.context_packer import ContextPacker, passage_label
+from core.services.vector_store import SearchHit
+
+
+def hit(chunk_id, text="teks passage singkat.", score=1.0, **metadata):
+    return SearchHit(id=chunk_id, text=text, metadata=metadata, score=score)
+
+
+def test_relevance_follows_ranked_order_not_query_cosine():
+    # Hit kedua (mis. hanya ditemukan BM25) embedding-nya jauh dari hit lain, tetap dipertahankan
+    hits = [hit("a", score=0.03), hit("bm25", score=0.02), hit("c", score=0.01)]
+    embeddings = np.array([[1, 0], [0, 1], [0.9, 0.1]], dtype=np.float32)
+    result = ContextPacker(token_budget=1000).pack(hits, embeddings, max_passages=2)
+    assert result.passage_ids == ["a", "bm25"]
+
+
+def test_near_duplicate_of_top_passage_is_skipped():
+    hits = [hit("a"), hit("a-copy"), hit("b")]
+    embeddings = np.array([[1, 0], [1, 0.01], [0.3, 1]], dtype=np.float32)
+    result = ContextPacker(token_budget=1000, mmr_lambda=0.5).pack(hits, embeddings, max_passages=2)
+    assert result.passage_ids == ["a", "b"]
+
+
+def test_without_embeddings_keeps_ranked_order():
+    hits = [hit(str(i)) for i in range(5)]
+    result = ContextPacker(token_budget=1000).pack(hits, None, max_passages=3)
+    assert result.passage_ids == ["0", "1", "2"]
+
+
+def test_token_budget_is_respected():
+    hits = [hit(str(i), text="kata " * 40) for i in range(5)]
+    packer = ContextPacker(token_budget=120)
+    result = packer.pack(hits, None, max_passages=5)
+    assert 1 <= len(result.passages) < 5
+    assert packer.count_tokens(result.text) <= 120
+
+
+def test_truncates_top_passage_when_nothing_fits():
+    hits = [hit("a", text="kata " * 200, source="burnout.pdf", page_start=2, page_end=2)]
+    result = ContextPacker(token_budget=30).pack(hits, None, max_passages=3)
+    assert result.passage_ids == ["a"]
+    assert result.text.startswith("[1] (burnout.pdf, hlm. 2)")
+    assert result.tokens <= 30
+
+
+def test_passage_label_formats_page_range():
+    assert passage_label(1, hit("a")) == "[1]"
+    assert passage_label(2, hit("a", source="x.pdf", page_start=4, page_end=5)) == "[2] (x.pdf, hlm. 4-5)"
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.services.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def test_concurrent_queries_share_one_batch_and_get_their_own_vector():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=200)
+    texts = ["a" * n for n in range(1, 9)]
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            vectors = list(pool.map(batcher.embed, texts))
+    finally:
+        batcher.close()
+    assert vectors == [[float(n)] for n in range(1, 9)]
+    assert len(encoder.batches) < len(texts)
+    assert all(len(batch) <= 8 for batch in encoder.batches)
+
+
+def test_batch_size_is_capped():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=2, max_wait_ms=100)
+    try:
+        futures = [batcher.submit(str(i)) for i in range(5)]
+        assert [future.result(timeout=5) for future in futures] == [[1.0]] * 5
+    finally:
+        batcher.close()
+    assert all(len(batch) <= 2 for batch in encoder.batches)
+
+
+def test_encoder_error_reaches_every_caller_in_the_batch():
+    def failing(texts):
+        raise RuntimeError("model belum dimuat")
+
+    batcher = EmbeddingBatcher(failing, max_batch_size=4, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(text) for text in ("a", "b")]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+        # Worker tetap hidup setelah error
+        assert batcher.submit("c").exception(timeout=5) is not None
+    finally:
+        batcher.close()
+
+
+def test_close_stops_worker_and_next_submit_restarts_it():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_wait_ms=0)
+    assert batcher.embed("ab", timeout=5) == [2.0]
+    batcher.close()
+    assert batcher.embed("abc", timeout=5) == [3.0]
+    batcher.close()
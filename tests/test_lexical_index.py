@@ -0,0 +1,45 @@
+import pytest
+
+from core.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from core.services.vector_store import SearchHit
+
+DOCUMENTS = {
+    "gad": "Skor GAD-7 mengukur tingkat kecemasan umum.",
+    "mbi": "MBI mengukur burnout: kelelahan emosional, sinisme, dan pencapaian pribadi.",
+    "tidur": "Tidur cukup membantu pemulihan energi dan suasana hati.",
+}
+
+
+def index():
+    return BM25Index(list(DOCUMENTS), list(DOCUMENTS.values()), [{"source": f"{key}.pdf"} for key in DOCUMENTS])
+
+
+def test_tokenize_keeps_questionnaire_names_whole():
+    assert tokenize("Hasil GAD-7 dan NAQ-R, K10!") == ["hasil", "gad-7", "dan", "naq-r", "k10"]
+
+
+def test_exact_term_ranks_its_document_first():
+    hits = index().search("berapa skor gad-7 saya", n_results=3)
+    assert [hit.id for hit in hits] == ["gad"]
+    assert hits[0].metadata == {"source": "gad.pdf"}
+
+
+def test_more_matching_terms_score_higher():
+    hits = index().search("mengukur burnout", n_results=3)
+    assert [hit.id for hit in hits] == ["mbi", "gad"]
+    assert hits[0].score > hits[1].score
+
+
+def test_unknown_terms_return_nothing():
+    assert index().search("obat antidepresan", n_results=3) == []
+    assert len(BM25Index([], [], [])) == 0
+
+
+def hit(chunk_id):
+    return SearchHit(id=chunk_id, text=chunk_id, metadata={}, score=0.0)
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[hit("a"), hit("b"), hit("c")], [hit("b"), hit("d")]], k=60)
+    assert [h.id for h in fused] == ["b", "a", "d", "c"]
+    assert fused[0].score == pytest.approx(1 / 62 + 1 / 61)
@@ -0,0 +1,105 @@
+from core.services.model_health import CLOSED, HALF_OPEN, OPEN, ModelHealthTracker
+
+
+def tracker(**kwargs):
+    options = dict(window=10, error_rate_threshold=0.5, min_requests=4,
+                   consecutive_failures=3, open_seconds=60.0)
+    options.update(kwargs)
+    return ModelHealthTracker(**options)
+
+
+def state(health, model):
+    return health.snapshot()[model]["state"]
+
+
+def test_opens_after_consecutive_failures():
+    health = tracker()
+    for _ in range(2):
+        health.record_failure("m", 1.0)
+    assert state(health, "m") == CLOSED
+    health.record_failure("m", 1.0)
+    assert state(health, "m") == OPEN
+    assert not health.is_available("m")
+    assert not health.acquire("m")
+
+
+def test_opens_on_error_rate_after_min_requests():
+    health = tracker(consecutive_failures=100)
+    for ok in (True, False, True, False):
+        (health.record_success if ok else health.record_failure)("m", 1.0)
+    assert state(health, "m") == OPEN
+
+
+def test_success_resets_consecutive_failures():
+    health = tracker(min_requests=100)
+    health.record_failure("m", 1.0)
+    health.record_failure("m", 1.0)
+    health.record_success("m", 1.0)
+    health.record_failure("m", 1.0)
+    assert state(health, "m") == CLOSED
+
+
+def test_half_open_allows_a_single_probe():
+    health = tracker(open_seconds=0.0)
+    for _ in range(3):
+        health.record_failure("m", 1.0)
+    assert state(health, "m") == HALF_OPEN
+    assert health.acquire("m")
+    assert not health.acquire("m")
+    assert not health.is_available("m")
+
+
+def test_probe_success_closes_and_starts_a_fresh_window():
+    health = tracker(open_seconds=0.0)
+    for _ in range(3):
+        health.record_failure("m", 1.0)
+    assert health.acquire("m")
+    health.record_success("m", 0.5)
+    snapshot = health.snapshot()["m"]
+    assert snapshot["state"] == CLOSED
+    assert snapshot["requests"] == 1 and snapshot["error_rate"] == 0.0
+
+
+def test_probe_failure_reopens():
+    health = tracker(open_seconds=0.0)
+    for _ in range(3):
+        health.record_failure("m", 1.0)
+    assert health.acquire("m")
+    health.open_seconds = 60.0
+    health.record_failure("m", 1.0)
+    assert state(health, "m") == OPEN
+
+
+def test_release_frees_the_probe_slot():
+    health = tracker(open_seconds=0.0)
+    for _ in range(3):
+        health.record_failure("m", 1.0)
+    assert health.acquire("m")
+    health.release("m")
+    assert health.is_available("m")
+    assert health.acquire("m")
+
+
+def test_order_prefers_healthy_then_fast_then_preference():
+    health = tracker(consecutive_failures=100, min_requests=100, slow_latency=5.0)
+    health.record_success("slow", 10.0)
+    health.record_success("fast", 1.0)
+    health.record_failure("flaky", 1.0)
+    health.record_success("flaky", 1.0)
+    assert health.order(["slow", "flaky", "fast", "new"]) == ["fast", "new", "slow", "flaky"]
+
+
+def test_order_skips_open_breakers():
+    health = tracker()
+    for _ in range(3):
+        health.record_failure("down", 1.0)
+    assert health.order(["down", "up"]) == ["up"]
+
+
+def test_latency_quantile_needs_min_samples():
+    health = tracker()
+    for latency in (1.0, 2.0, 3.0, 4.0):
+        health.record_success("m", latency)
+    assert health.latency_quantile("m", 0.5, min_samples=5) is None
+    assert health.latency_quantile("m", 0.5, min_samples=4) == 3.0
+    assert health.latency_quantile("m", 0.99) == 4.0
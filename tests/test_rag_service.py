@@ -0,0 +1,138 @@
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+# Modul RAG mengimpor dependensi runtime (chromadb, PyMuPDF, python-dotenv)
+pytest.importorskip("dotenv")
+pytest.importorskip("chromadb")
+pytest.importorskip("fitz")
+
+import rag_cli  # noqa: E402
+from common.config.settings import settings  # noqa: E402
+from core.services.rag_service import RagService  # noqa: E402
+
+
+def fake_embed(texts):
+    """Embedding deterministik dari hash teks (tanpa model)"""
+    vectors = []
+    for text in texts:
+        vector = np.frombuffer(hashlib.sha256(text.encode("utf-8")).digest(), dtype=np.uint8)[:16].astype(np.float32)
+        vectors.append((vector / np.linalg.norm(vector)).tolist())
+    return vectors
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RAG_VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "RAG_NUMPY_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr(settings, "RAG_HYBRID_ENABLED", False)
+    monkeypatch.setattr(settings, "RAG_DEDUP_ENABLED", True)
+    # GC timer tidak boleh berjalan di tengah test
+    monkeypatch.setattr(settings, "RAG_INDEX_GC_GRACE_SECONDS", 3600)
+    rag = RagService()
+    monkeypatch.setattr(rag.embedding_fn, "embed_documents", fake_embed)
+    monkeypatch.setattr(rag.embedding_fn, "embed_query", lambda text: fake_embed([text])[0])
+    yield rag
+    rag.shutdown()
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "corpus"
+    path.mkdir()
+    return path
+
+
+def write(corpus, name, text):
+    (corpus / name).write_text(text, encoding="utf-8")
+
+
+def versions(service):
+    return sorted(name for name in os.listdir(service.backend.root) if name.startswith("v"))
+
+
+def test_missing_corpus_directory_is_rejected(service, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        service.build_corpus(str(tmp_path / "salah-ketik"))
+    assert rag_cli.main(["build", "--corpus", str(tmp_path / "salah-ketik")]) == 1
+
+
+def test_gc_keeps_active_and_previous_version(service, corpus):
+    write(corpus, "a.txt", "Burnout adalah kelelahan emosional akibat kerja.")
+    for edit in range(3):
+        with open(corpus / "a.txt", "a", encoding="utf-8") as f:
+            f.write(f" Tambahan kalimat nomor {edit}.")
+        service.build_corpus(str(corpus))
+        service.gc_stale_versions(keep_previous=True)
+    assert versions(service) == [f"v{service.previous_index_version}", f"v{service.index_version}"]
+
+    service.gc_stale_versions()
+    assert versions(service) == [f"v{service.index_version}"]
+
+
+def test_unchanged_sources_are_skipped(service, corpus):
+    write(corpus, "a.txt", "Burnout adalah kelelahan emosional akibat kerja.")
+    write(corpus, "b.txt", "Tidur cukup membantu pemulihan energi.")
+    first = service.build_corpus(str(corpus))
+    assert first.sources_indexed == ["a.txt", "b.txt"]
+
+    write(corpus, "b.txt", "Olahraga teratur membantu mengelola stres.")
+    second = service.build_corpus(str(corpus))
+    assert second.sources_indexed == ["b.txt"] and second.sources_skipped == ["a.txt"]
+    assert second.version != first.version
+
+
+def test_mtime_only_change_does_not_publish(service, corpus):
+    write(corpus, "a.txt", "Burnout adalah kelelahan emosional akibat kerja.")
+    version = service.build_corpus(str(corpus)).version
+    stat = os.stat(corpus / "a.txt")
+    os.utime(corpus / "a.txt", (stat.st_atime, stat.st_mtime + 10))
+
+    report = service.build_corpus(str(corpus))
+    assert report.version == version and report.sources_skipped == ["a.txt"]
+    # Manifest diperbarui: build berikutnya tidak perlu membaca ulang file
+    assert service.build_corpus(str(corpus)).chunks_loaded == 0
+
+
+def test_unreadable_source_keeps_its_indexed_chunks(service, corpus, monkeypatch):
+    write(corpus, "a.txt", "Burnout adalah kelelahan emosional akibat kerja.")
+    write(corpus, "b.txt", "Tidur cukup membantu pemulihan energi.")
+    service.build_corpus(str(corpus))
+    chunks_before = service.index.count()
+
+    write(corpus, "b.txt", "Versi baru yang tidak bisa dibaca.")
+    (corpus / "rusak.pdf").write_bytes(b"bukan pdf")
+    load_chunks = service._load_chunks
+
+    def failing_load(file_path, source, stats=None):
+        if source == "b.txt":
+            raise OSError("disk error")
+        return load_chunks(file_path, source, stats)
+
+    monkeypatch.setattr(service, "_load_chunks", failing_load)
+    report = service.build_corpus(str(corpus))
+    assert sorted(report.sources_failed) == ["b.txt", "rusak.pdf"]
+    assert report.sources_removed == []
+    assert service.index.count() == chunks_before
+
+    # File yang gagal dicoba lagi pada build berikutnya
+    monkeypatch.setattr(service, "_load_chunks", load_chunks)
+    (corpus / "rusak.pdf").unlink()
+    assert service.build_corpus(str(corpus)).sources_indexed == ["b.txt"]
+
+
+def test_duplicate_is_restored_when_its_original_source_changes(service, corpus):
+    paragraph = "Burnout adalah kelelahan emosional, sinisme, dan menurunnya pencapaian pribadi akibat stres kerja."
+    write(corpus, "a.txt", paragraph)
+    write(corpus, "b.txt", paragraph)
+    report = service.build_corpus(str(corpus))
+    assert len(report.duplicates) == 1 and service.index.count() == 1
+
+    write(corpus, "a.txt", "Tidur cukup membantu pemulihan energi setelah shift malam.")
+    report = service.build_corpus(str(corpus))
+    # b.txt tidak berubah, tetapi chunk aslinya (di a.txt) hilang: b.txt dimuat ulang
+    assert report.sources_indexed == ["a.txt", "b.txt"]
+    _, metadatas = service.index.ids_and_metadatas()
+    assert sorted(metadata["source"] for metadata in metadatas) == ["a.txt", "b.txt"]
@@ -0,0 +1,29 @@
+import pytest
+
+from common.utils.text_utils import TextUtils
+
+
+@pytest.mark.parametrize("question", [
+    "saya suka berolahraga",
+    "saya emosional",
+    "masalah psikologis",
+    "depresif",
+    "tertidur",
+    "stresnya makin berat",
+    "skor gad 7 saya tinggi",
+    "hasil MBI saya",
+    "arti skor K10",
+    "well being pekerja",
+])
+def test_is_psikologi_related_matches_keywords_and_affixes(question):
+    assert TextUtils.is_psikologi_related(question)
+
+
+@pytest.mark.parametrize("question", [
+    "",
+    "saya mau ambil cuti",
+    "siapa presiden pertama indonesia",
+    "resep nasi goreng",
+])
+def test_is_psikologi_related_rejects_unrelated(question):
+    assert not TextUtils.is_psikologi_related(question)
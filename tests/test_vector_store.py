@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+
+from core.services.vector_store import (
+    ChromaBackend, NumpyBackend, active_version_mtime, read_active_version, write_active_version
+)
+
+
+class FakeChromaClient:
+    def __init__(self, names):
+        self.names = list(names)
+
+    def list_collections(self):
+        return list(self.names)
+
+    def delete_collection(self, name):
+        self.names.remove(name)
+
+
+def chroma_backend(names):
+    # Tanpa chromadb: cukup client palsu untuk logika drop_stale
+    backend = ChromaBackend.__new__(ChromaBackend)
+    backend.collection_name = "kitab"
+    backend.client = FakeChromaClient(names)
+    return backend
+
+
+def test_chroma_drop_stale_keeps_legacy_collection_while_it_is_active():
+    backend = chroma_backend(["kitab", "kitab__v1", "lain"])
+    backend.drop_stale(None)
+    assert backend.client.names == ["kitab", "lain"]
+
+
+def test_chroma_drop_stale_keeps_requested_versions():
+    backend = chroma_backend(["kitab", "kitab__v1", "kitab__v2", "kitab__v3"])
+    backend.drop_stale("3", "2")
+    assert backend.client.names == ["kitab__v2", "kitab__v3"]
+
+
+def write_version(backend, version, texts):
+    writer = backend.create(version)
+    embeddings = np.eye(len(texts), 4, dtype=np.float32)
+    writer.add([f"id{i}" for i in range(len(texts))], texts, [{"source": "a.txt"}] * len(texts), embeddings)
+    return backend.finalize(writer)
+
+
+def test_numpy_versions_roundtrip_and_drop_stale(tmp_path):
+    backend = NumpyBackend(str(tmp_path))
+    for version in ("1", "2", "3"):
+        write_version(backend, version, ["satu", "dua"])
+    index = backend.open("2")
+    assert index.count() == 2
+    assert index.query([0, 1, 0, 0], n_results=1)[0].id == "id1"
+
+    backend.drop_stale("3", "2")
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith("v")) == ["v2", "v3"]
+    assert backend.open("1") is None
+
+
+def test_active_version_pointer(tmp_path):
+    root = str(tmp_path)
+    assert read_active_version(root) is None and active_version_mtime(root) is None
+    write_active_version(root, "5")
+    assert read_active_version(root) == "5"
+    assert active_version_mtime(root) is not None